@@ -1,17 +1,94 @@
+from typing import Optional
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
+from core.enums import SlowConsumerPolicy
+from core.poker.poker_enums import CardEncoding
+
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Minha API Insana"
     VERSION: str = "1.0.0"
     
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # padrão: DATABASE_URL com o driver async
+    DB_POOL_SIZE: int = 5  # conexões mantidas abertas por engine
+    DB_MAX_OVERFLOW: int = 10  # conexões extras em picos
+    DB_POOL_TIMEOUT: float = 30.0  # segundos esperando uma conexão livre
+    DB_POOL_RECYCLE: int = 1800  # segundos até reabrir uma conexão (-1 = nunca)
+    DB_POOL_PRE_PING: bool = True  # testa a conexão antes de usar
+    SQLITE_WAL: bool = True  # WAL e pragmas aplicados a cada conexão SQLite
+    SQLITE_BUSY_TIMEOUT: int = 5000  # ms esperando o lock de escrita
 
     SECRET_KEY: str
     ALGORITHM: str
 
     ACCESS_TOKEN_EXP: int = 30   # minutos
     REFRESH_TOKEN_EXP: int = 30  # dias
+    REFRESH_TOKEN_MAX_PER_USER: int = 10  # sessões ativas por usuário (0 = sem limite)
+    REFRESH_TOKEN_COMPACTION_INTERVAL: float = 3600.0  # segundos entre limpezas dos expirados (0 = desativado)
+    REFRESH_TOKEN_COMPACTION_BATCH: int = 1000  # linhas apagadas por transação
+    REVOKED_TOKEN_INDEX_SIZE: int = 100000  # JTIs revogados mantidos em memória
+    TOKEN_CACHE_SIZE: int = 10000  # tokens verificados em cache (0 = desativado)
+    USER_CACHE_SIZE: int = 10000  # identidades em cache nos deps de autenticação
+    USER_CACHE_TTL: float = 60.0  # segundos até reler o usuário do banco (0 = desativado)
+
+    AUTH_RATE_LIMIT_ENABLED: bool = True  # limite de login/registro antes do hash
+    AUTH_RATE_LIMIT_IP_PER_MINUTE: float = 30.0  # tentativas por IP
+    AUTH_RATE_LIMIT_IP_BURST: int = 10
+    AUTH_RATE_LIMIT_EMAIL_PER_MINUTE: float = 10.0  # tentativas por e-mail
+    AUTH_RATE_LIMIT_EMAIL_BURST: int = 5
+    AUTH_RATE_LIMIT_MAX_KEYS: int = 100000  # buckets em memória por tipo de chave
+
+    PASSWORD_SHA256_ROUNDS: int = 535000  # custo do sha256_crypt; hashes abaixo são refeitos no login
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # custo do bcrypt (só hashes antigos)
+    PASSWORD_HASH_WORKERS: int = 2  # hashes simultâneos
+    PASSWORD_HASH_QUEUE_SIZE: int = 32  # hashes aguardando antes de responder 503
+    PASSWORD_HASH_PROCESSES: bool = True  # pool de processos (o hash segura o GIL)
+
+    WS_SEND_QUEUE_SIZE: int = 64  # mensagens pendentes por conexão
+    WS_SLOW_CONSUMER_POLICY: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE  # fila cheia: drop/coalesce de states e deltas, senão desconecta
+
+    POKER_CARD_ENCODING: CardEncoding = CardEncoding.TEXT  # "text" ("Ah") ou "int" (0–51)
+    POKER_ENGINE_WORKERS: int = 0  # 0 = pokerkit direto no event loop
+    POKER_FAST_EVALUATOR: bool = True  # showdown pelo avaliador de tabelas
+    POKER_SEEDED_DECKS: bool = False  # baralho com seed registrado: mãos reproduzíveis (exigido pelos snapshots)
+    POKER_SHOWDOWN_EQUITY: bool = True  # frame showdown_equity após um all-in
+    EQUITY_SAMPLES: int = 5000  # amostras do Monte Carlo
+
+    HAND_HISTORY_ENABLED: bool = True  # persiste as mãos terminadas
+    HAND_HISTORY_BATCH_SIZE: int = 100  # mãos por insert em lote
+    HAND_HISTORY_FLUSH_INTERVAL: float = 1.0  # segundos até gravar um lote incompleto
+    HAND_HISTORY_QUEUE_SIZE: int = 10000  # mãos pendentes antes de descartar
+    HAND_ARCHIVE_ENABLED: bool = True  # arquivo binário append-only das mãos
+    HAND_ARCHIVE_DIR: str = "hand_archive"
+    HAND_ARCHIVE_SEGMENT_BYTES: int = 64 * 1024 * 1024  # tamanho de cada segmento
+
+    SNAPSHOT_ENABLED: bool = False  # snapshots das salas para restart sem perder mesas (requer POKER_SEEDED_DECKS)
+    SNAPSHOT_DIR: str = "snapshots"
+    SNAPSHOT_INTERVAL: float = 5.0  # segundos entre snapshots (0 = só sob demanda)
+
+    METRICS_ENABLED: bool = True  # endpoint /metrics (formato Prometheus)
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5  # segundos entre medições do atraso do event loop (0 = desativado)
+
+    TRACE_ENABLED: bool = False  # tracing do WebSocket ligado desde o startup
+    TRACE_BUFFER_SIZE: int = 100000  # spans mantidos no ring buffer
+    TRACE_PROFILE_HZ: int = 0  # amostras de pilha por segundo com tracing ligado (0 = sem profiler)
+
+    ADMIN_TOKEN: Optional[str] = None  # header X-Admin-Token dos endpoints de administração
+
+    SHARD_COUNT: int = 1  # processos; cada um é dono de parte das salas
+    SHARD_INDEX: int = 0
+    SHARD_BASE_PORT: int = 8000  # shard i escuta em SHARD_BASE_PORT + i
+    SHARD_URL_TEMPLATE: str = "ws://127.0.0.1:{port}"
+
+    @model_validator(mode="after")
+    def check_snapshot_decks(self):
+        # A mão em andamento é restaurada pelo seed + ações
+        if self.SNAPSHOT_ENABLED and not self.POKER_SEEDED_DECKS:
+            raise ValueError("SNAPSHOT_ENABLED requer POKER_SEEDED_DECKS")
+        return self
 
     class Config:
         env_file = ".env"
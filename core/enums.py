@@ -2,4 +2,10 @@ from enum import Enum
 
 class TokenType(str, Enum):
     ACCESS = "access"
-    REFRESH = "refresh"
\ No newline at end of file
+    REFRESH = "refresh"
+
+
+class SlowConsumerPolicy(str, Enum):
+    DROP = "drop"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
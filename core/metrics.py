@@ -0,0 +1,268 @@
+"""
+Métricas do processo no formato texto do Prometheus.
+
+Os instrumentos são feitos para o caminho quente: um incremento de
+atributo (Counter) ou um bisect numa lista fixa de limites (Histogram),
+sem locks. Tudo roda no event loop ou nas threads do próprio processo;
+sob o GIL, uma atualização concorrente rara pode se perder, o que é
+aceitável para métricas. Valores que já existem em outros objetos
+(salas, conexões, caches) são lidos só na coleta, por callbacks.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Limites em segundos: de 10µs a 10s, escala ~x2.5
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Limites em bytes: de 64B a 1MB
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Contador monotônico"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Histogram:
+    """Histograma de limites fixos (acumulados só na exposição)"""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: Dict[str, str]) -> Iterable[Sample]:
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield f"{name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+        cumulative += self.counts[-1]
+        yield f"{name}_bucket", {**labels, "le": "+Inf"}, cumulative
+        yield f"{name}_sum", labels, self.sum
+        yield f"{name}_count", labels, cumulative
+
+
+class _Family:
+    """Métrica com labels: um instrumento filho por combinação de valores"""
+
+    def __init__(self, name: str, help: str, kind: str, factory: Callable[[], Any], label_names: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.factory = factory
+        self.label_names = label_names
+        self.children: Dict[Tuple[str, ...], Any] = {}
+        if not label_names:
+            self.children[()] = factory()
+
+    def labels(self, *values: str):
+        # Caminho quente: dict lookup; o filho é criado só na primeira vez
+        child = self.children.get(values)
+        if child is None:
+            child = self.children.setdefault(values, self.factory())
+        return child
+
+    def samples(self) -> Iterable[Sample]:
+        for values, child in list(self.children.items()):
+            labels = dict(zip(self.label_names, values))
+            if isinstance(child, Histogram):
+                yield from child.samples(self.name, labels)
+            else:
+                yield self.name, labels, child.value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.families: Dict[str, _Family] = {}
+        self.gauges: List[Tuple[str, str, Callable[[], Any]]] = []
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        family = self._family(name, help, "counter", Counter, labels)
+        return family if labels else family.children[()]
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        family = self._family(name, help, "histogram", lambda: Histogram(buckets), labels)
+        return family if labels else family.children[()]
+
+    def gauge(self, name: str, help: str, fn: Callable[[], Any]):
+        """Valor lido só na coleta"""
+        self.gauges.append((name, help, fn))
+
+    def collector(self, fn: Callable[[], Iterable[Sample]]):
+        """Callback que devolve amostras (nome, labels, valor) de estatísticas existentes"""
+        self.collectors.append(fn)
+        return fn
+
+    def _family(self, name, help, kind, factory, labels) -> _Family:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = _Family(name, help, kind, factory, tuple(labels))
+        return family
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        for family in list(self.families.values()):
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for name, labels, value in family.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, help, fn in self.gauges:
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Error reading gauge {name}: {e}")
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+
+        for fn in self.collectors:
+            try:
+                samples = list(fn())
+            except Exception as e:
+                logger.debug(f"Error running metrics collector: {e}")
+                continue
+            for name, labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+class LoopLagMonitor:
+    """Atraso do event loop: quanto um sleep de `interval` passa do previsto"""
+
+    def __init__(self, registry: MetricsRegistry, interval: float):
+        self.interval = interval
+        self.histogram = registry.histogram("event_loop_lag_seconds", "Atraso do event loop")
+        self.max_lag = 0.0
+        self.task: Optional[asyncio.Task] = None
+        registry.gauge("event_loop_lag_max_seconds", "Maior atraso do event loop observado", lambda: self.max_lag)
+
+    def start(self):
+        if self.task is None and self.interval > 0:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.histogram.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+
+def stats_samples(prefix: str, stats: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> List[Sample]:
+    """Converte um dict de get_stats() em amostras (só valores numéricos)"""
+    labels = labels or {}
+    return [
+        (f"{prefix}_{key}", labels, value)
+        for key, value in stats.items()
+        if isinstance(value, (int, float))
+    ]
+
+
+registry = MetricsRegistry()
+
+# Instrumentos do caminho quente
+
+MOVE_SECONDS = registry.histogram(
+    "poker_move_seconds", "Tempo de process_move por ação", ("action",)
+)
+MOVE_ERRORS = registry.counter(
+    "poker_move_errors_total", "Jogadas recusadas por ação", ("action",)
+)
+STATE_BUILD_SECONDS = registry.histogram(
+    "poker_state_build_seconds", "Tempo para montar o estado público da mesa"
+)
+STATE_CACHE_HITS = registry.counter(
+    "poker_state_cache_hits_total", "Estado público servido do cache da versão"
+)
+FANOUT_SECONDS = registry.histogram(
+    "ws_fanout_seconds", "Tempo para enfileirar um broadcast para a sala"
+)
+FANOUT_RECIPIENTS = registry.counter(
+    "ws_fanout_recipients_total", "Destinatários de broadcasts"
+)
+FANOUT_BYTES = registry.counter(
+    "ws_fanout_bytes_total", "Bytes enfileirados por broadcasts (tamanho x destinatários; caracteres em frames de texto)"
+)
+FRAME_BYTES = registry.histogram(
+    "ws_frame_bytes", "Tamanho dos frames enviados", buckets=SIZE_BUCKETS
+)
+MESSAGES_SENT = registry.counter("ws_messages_sent_total", "Mensagens escritas nos WebSockets")
+BYTES_SENT = registry.counter("ws_bytes_sent_total", "Bytes escritos nos WebSockets (caracteres em frames de texto)")
+MESSAGES_DROPPED = registry.counter(
+    "ws_messages_dropped_total", "Mensagens descartadas por clientes lentos"
+)
+HTTP_SECONDS = registry.histogram(
+    "http_request_seconds", "Duração das requisições HTTP por rota", ("method", "route", "status")
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_seconds", "Duração das consultas ao banco", ("engine",)
+)
+
+loop_lag_monitor = LoopLagMonitor(registry, settings.METRICS_LOOP_LAG_INTERVAL)
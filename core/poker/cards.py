@@ -0,0 +1,42 @@
+from typing import Dict, Iterable, List, Union
+
+from pokerkit import Card, Rank, Suit
+
+from core.poker.poker_enums import CardEncoding
+
+
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+
+# Tabelas estáticas das 52 cartas: código textual ("Ah") e inteiro 0–51
+# (índice = rank * 4 + naipe, na ordem de RANKS e SUITS)
+CARD_CODES: Dict[Card, str] = {}
+CARD_INDICES: Dict[Card, int] = {}
+CARDS_BY_INDEX: List[Card] = []
+
+for _rank_index, _rank in enumerate(RANKS):
+    for _suit_index, _suit in enumerate(SUITS):
+        _card = Card(Rank(_rank), Suit(_suit))
+        CARD_CODES[_card] = _rank + _suit
+        CARD_INDICES[_card] = _rank_index * 4 + _suit_index
+        CARDS_BY_INDEX.append(_card)
+
+CODE_INDICES: Dict[str, int] = {code: CARD_INDICES[card] for card, code in CARD_CODES.items()}
+
+
+def card_table(encoding: CardEncoding) -> Dict[Card, Union[str, int]]:
+    """Retorna a tabela de conversão para a codificação pedida"""
+    if encoding == CardEncoding.INT:
+        return CARD_INDICES
+    return CARD_CODES
+
+
+def parse_card_codes(codes: Iterable[str]) -> List[int]:
+    """Converte códigos ("Ah") em índices 0–51"""
+    indices = []
+    for code in codes:
+        if code not in CODE_INDICES:
+            raise ValueError(f"Carta inválida: {code}")
+        indices.append(CODE_INDICES[code])
+    return indices
+
@@ -0,0 +1,61 @@
+import random
+import secrets
+from typing import List, Optional, Tuple
+
+from pokerkit import Card, NoLimitTexasHoldem, State
+
+from core.poker.cards import CARDS_BY_INDEX
+
+
+def new_seed() -> int:
+    """Seed de um baralho (cabe num BIGINT com sinal)"""
+    return secrets.randbits(63)
+
+
+def seeded_deck(seed: int) -> List[Card]:
+    """Ordem do baralho determinada pelo seed"""
+    deck = list(CARDS_BY_INDEX)
+    random.Random(seed).shuffle(deck)
+    return deck
+
+
+def deal_pending(state: State):
+    """
+    Faz as distribuições pendentes (burn, hole, board) tirando cartas do
+    topo do baralho, no lugar das automações de distribuição do pokerkit.
+    """
+    # Os can_* do pokerkit percorrem o baralho: só consulta se há algo pendente
+    while (
+        state.card_burning_status
+        or any(state.hole_dealing_statuses)
+        or any(state.board_dealing_counts)
+    ):
+        if state.can_burn_card():
+            state.burn_card()
+        elif state.can_deal_hole():
+            state.deal_hole()
+        elif state.can_deal_board():
+            state.deal_board()
+        else:
+            return
+
+
+def create_state(
+    game: NoLimitTexasHoldem,
+    starting_stacks: Tuple[int, ...],
+    player_count: int,
+    seed: Optional[int] = None
+) -> State:
+    """
+    Cria o State da mão. Com seed, o jogo deve ter as distribuições
+    manuais (get_game_definition(..., seeded=True)): o baralho embaralhado
+    pelo pokerkit é trocado pela ordem do seed antes de qualquer carta sair.
+    """
+    state = game(starting_stacks, player_count)
+
+    if seed is not None:
+        state.deck_cards.clear()
+        state.deck_cards.extend(seeded_deck(seed))
+        deal_pending(state)
+
+    return state
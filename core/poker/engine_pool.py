@@ -0,0 +1,90 @@
+import asyncio
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EngineWorker:
+    """Thread dedicada que executa a lógica pokerkit das salas fixadas nela"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"poker-engine-{index}")
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "total_queue_time": 0.0,
+            "max_queue_time": 0.0,
+            "total_run_time": 0.0,
+            "max_run_time": 0.0,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        completed = self.stats["completed"]
+        return {
+            "worker": self.index,
+            **self.stats,
+            "pending": self.stats["submitted"] - completed,
+            "avg_queue_time": self.stats["total_queue_time"] / completed if completed else 0.0,
+            "avg_run_time": self.stats["total_run_time"] / completed if completed else 0.0,
+        }
+
+
+class EnginePool:
+    """
+    Pool de workers para tirar transições de estado e showdown do event loop.
+    Cada sala é fixada sempre no mesmo worker, preservando a ordem das jogadas.
+    """
+
+    def __init__(self, workers: int):
+        self.workers: List[EngineWorker] = [EngineWorker(i) for i in range(workers)]
+
+    def worker_for(self, room_id: str) -> EngineWorker:
+        return self.workers[zlib.crc32(room_id.encode("utf-8")) % len(self.workers)]
+
+    async def run(self, room_id: str, fn: Callable, *args) -> Any:
+        """Executa fn(*args) no worker da sala e retorna apenas o resultado"""
+        return await self._run(self.worker_for(room_id), fn, *args)
+
+    async def run_any(self, fn: Callable, *args) -> Any:
+        """Cálculo sem sala: vai para o worker com menos trabalho pendente"""
+        worker = min(self.workers, key=lambda item: item.stats["submitted"] - item.stats["completed"])
+        return await self._run(worker, fn, *args)
+
+    async def _run(self, worker: EngineWorker, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            result = fn(*args)
+            return result, started_at, time.perf_counter()
+
+        worker.stats["submitted"] += 1
+        try:
+            result, started_at, finished_at = await loop.run_in_executor(worker.executor, job)
+        finally:
+            worker.stats["completed"] += 1
+
+        queue_time = started_at - submitted_at
+        run_time = finished_at - started_at
+        stats = worker.stats
+        stats["total_queue_time"] += queue_time
+        stats["total_run_time"] += run_time
+        if queue_time > stats["max_queue_time"]:
+            stats["max_queue_time"] = queue_time
+        if run_time > stats["max_run_time"]:
+            stats["max_run_time"] = run_time
+
+        return result
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        return [worker.get_stats() for worker in self.workers]
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.executor.shutdown(wait=False)
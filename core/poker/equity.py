@@ -0,0 +1,110 @@
+import itertools
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from core.poker.evaluator import evaluate_batch
+
+
+PREFLOP_TABLE_PATH = os.path.join(os.path.dirname(__file__), "data", "preflop_equity.npy")
+
+_preflop_table: Optional[np.ndarray] = None
+
+
+def hand_class(first: int, second: int) -> int:
+    """Índice 0–168 da classe inicial (par, suited ou offsuit)"""
+    high, low = max(first >> 2, second >> 2), min(first >> 2, second >> 2)
+    if (first & 3) == (second & 3):
+        return high * 13 + low
+    return low * 13 + high
+
+
+def load_preflop_table(path: str = PREFLOP_TABLE_PATH) -> Optional[np.ndarray]:
+    """Carrega a tabela heads-up 2 x 169 x 169 (equity e empate em pontos-base)"""
+    global _preflop_table
+    if _preflop_table is None and os.path.exists(path):
+        _preflop_table = np.load(path)
+    return _preflop_table
+
+
+def _showdown_shares(values: np.ndarray) -> np.ndarray:
+    # values: jogadores x amostras -> fração do pote de cada jogador por amostra
+    best = values.max(axis=0)
+    winners = values == best
+    return winners / winners.sum(axis=0)
+
+
+def calculate_equity(
+    hands: Sequence[Sequence[int]],
+    board: Sequence[int] = (),
+    samples: int = 5000,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Equity de cada mão (cartas como índices 0–51) dado o board atual.
+    Enumeração exata para flop/turn/river, tabela pré-calculada para
+    heads-up pré-flop e Monte Carlo vetorizado nos demais casos.
+    """
+    hands = [list(hand) for hand in hands]
+    board = list(board)
+    known = [card for hand in hands for card in hand] + board
+
+    if len(hands) < 2 or any(len(hand) != 2 for hand in hands):
+        raise ValueError("Informe ao menos duas mãos de 2 cartas")
+    if len(board) > 5 or len(set(known)) != len(known) or not all(0 <= card < 52 for card in known):
+        raise ValueError("Cartas inválidas ou repetidas")
+
+    missing = 5 - len(board)
+
+    if missing == 5 and len(hands) == 2:
+        table = load_preflop_table()
+        if table is not None:
+            first = hand_class(*hands[0])
+            second = hand_class(*hands[1])
+            equity = float(table[0, first, second]) / 10000
+            tie = float(table[1, first, second]) / 10000
+            return {
+                "method": "table",
+                "samples": None,
+                "players": [
+                    {"equity": equity, "win": max(0.0, equity - tie / 2), "tie": tie},
+                    {"equity": 1 - equity, "win": max(0.0, 1 - equity - tie / 2), "tie": tie},
+                ],
+            }
+
+    known_set = set(known)
+    deck = np.array([card for card in range(52) if card not in known_set], dtype=np.int64)
+
+    if missing == 0:
+        # Board completo: um único "runout" vazio
+        method = "exact"
+        runouts = np.empty((1, 0), dtype=np.int64)
+    elif missing <= 2:
+        method = "exact"
+        runouts = np.array(list(itertools.combinations(deck, missing)), dtype=np.int64).reshape(-1, missing)
+    else:
+        method = "monte_carlo"
+        rng = np.random.default_rng(seed)
+        picks = rng.random((samples, len(deck))).argpartition(missing, axis=1)[:, :missing]
+        runouts = deck[picks]
+
+    boards = np.hstack([np.broadcast_to(np.array(board, dtype=np.int64), (len(runouts), len(board))), runouts])
+
+    values = np.stack([
+        evaluate_batch(np.hstack([np.broadcast_to(np.array(hand, dtype=np.int64), (len(boards), 2)), boards]))
+        for hand in hands
+    ])
+    shares = _showdown_shares(values)
+    wins = (shares == 1).mean(axis=1)
+    ties = ((shares > 0) & (shares < 1)).mean(axis=1)
+    equities = shares.mean(axis=1)
+
+    return {
+        "method": method,
+        "samples": len(runouts),
+        "players": [
+            {"equity": float(equities[i]), "win": float(wins[i]), "tie": float(ties[i])}
+            for i in range(len(hands))
+        ],
+    }
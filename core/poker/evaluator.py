@@ -0,0 +1,233 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from pokerkit import Card, NoLimitTexasHoldem, StandardHighHand
+
+from core.poker.cards import CARD_INDICES
+
+
+# Categorias de mão, da mais fraca para a mais forte
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = range(9)
+
+CATEGORY_NAMES = (
+    "high_card",
+    "pair",
+    "two_pair",
+    "trips",
+    "straight",
+    "flush",
+    "full_house",
+    "quads",
+    "straight_flush",
+)
+
+# Sequências (máscara de ranks, carta mais alta), incluindo a roda A-2-3-4-5
+_STRAIGHTS = [(0x1F << (high - 4), high) for high in range(12, 3, -1)] + [(0x100F, 3)]
+
+_POW5 = [5 ** rank for rank in range(13)]
+_POW5_ARRAY = np.array(_POW5, dtype=np.int64)
+_BITS_ARRAY = np.array([1 << rank for rank in range(13)], dtype=np.int64)
+
+_tables: Optional[Dict[str, Any]] = None
+
+
+def _straight_high(mask: int) -> int:
+    for straight, high in _STRAIGHTS:
+        if mask & straight == straight:
+            return high
+    return -1
+
+
+def _value(category: int, ranks: Sequence[int]) -> int:
+    # categoria no dígito mais alto, depois até 5 ranks de desempate (base 16)
+    value = category
+    for i in range(5):
+        value = value * 16 + (ranks[i] if i < len(ranks) else 0)
+    return value
+
+
+def _rank_value(counts: Sequence[int]) -> int:
+    """Valor da melhor mão sem flush para uma contagem de ranks de 5 a 7 cartas"""
+    present = [rank for rank in range(12, -1, -1) if counts[rank]]
+    by_count = sorted(((counts[rank], rank) for rank in present), reverse=True)
+    quads = [rank for count, rank in by_count if count == 4]
+    trips = [rank for count, rank in by_count if count == 3]
+    pairs = [rank for count, rank in by_count if count == 2]
+
+    def kickers(exclude, n):
+        return [rank for rank in present if rank not in exclude][:n]
+
+    if quads:
+        return _value(QUADS, [quads[0]] + kickers({quads[0]}, 1))
+
+    if trips and (len(trips) > 1 or pairs):
+        return _value(FULL_HOUSE, [trips[0], max(trips[1:] + pairs)])
+
+    mask = sum(1 << rank for rank in present)
+    high = _straight_high(mask)
+    if high >= 0:
+        return _value(STRAIGHT, [high])
+
+    if trips:
+        return _value(TRIPS, [trips[0]] + kickers({trips[0]}, 2))
+
+    if len(pairs) > 1:
+        return _value(TWO_PAIR, pairs[:2] + kickers(set(pairs[:2]), 1))
+
+    if pairs:
+        return _value(PAIR, [pairs[0]] + kickers({pairs[0]}, 3))
+
+    return _value(HIGH_CARD, kickers(set(), 5))
+
+
+def _flush_value(mask: int) -> int:
+    high = _straight_high(mask)
+    if high >= 0:
+        return _value(STRAIGHT_FLUSH, [high])
+    return _value(FLUSH, [rank for rank in range(12, -1, -1) if mask >> rank & 1][:5])
+
+
+def _rank_counts(remaining: int, rank: int = 0):
+    # Todas as contagens de 13 ranks (0–4 cada) que somam `remaining`
+    if rank == 12:
+        if remaining <= 4:
+            yield (remaining,)
+        return
+
+    for count in range(min(remaining, 4) + 1):
+        for rest in _rank_counts(remaining - count, rank + 1):
+            yield (count,) + rest
+
+
+def _build_tables() -> Dict[str, Any]:
+    # Chave de uma mão: soma de 5^rank por carta (única enquanto cada rank <= 4)
+    rank_values: Dict[int, int] = {}
+    for size in (5, 6, 7):
+        for counts in _rank_counts(size):
+            key = sum(count * _POW5[rank] for rank, count in enumerate(counts))
+            rank_values[key] = _rank_value(counts)
+
+    flush_values = [0] * (1 << 13)
+    for mask in range(1 << 13):
+        if bin(mask).count("1") >= 5:
+            flush_values[mask] = _flush_value(mask)
+
+    keys = np.fromiter(rank_values.keys(), dtype=np.int64, count=len(rank_values))
+    values = np.fromiter(rank_values.values(), dtype=np.int32, count=len(rank_values))
+    order = np.argsort(keys)
+
+    return {
+        "rank_values": rank_values,
+        "flush_values": flush_values,
+        "keys": keys[order],
+        "values": values[order],
+        "flush": np.asarray(flush_values, dtype=np.int32),
+    }
+
+
+def get_tables() -> Dict[str, Any]:
+    """Tabelas de ranks e de flush, construídas uma vez por processo"""
+    global _tables
+    if _tables is None:
+        _tables = _build_tables()
+    return _tables
+
+
+def evaluate(cards: Sequence[int]) -> int:
+    """Valor da melhor mão de 5 a 7 cartas (índices 0–51); maior é melhor"""
+    tables = get_tables()
+    key = 0
+    suit_masks = [0, 0, 0, 0]
+    for card in cards:
+        rank = card >> 2
+        key += _POW5[rank]
+        suit_masks[card & 3] |= 1 << rank
+
+    # Com até 7 cartas, um flush exclui quadra e full house
+    for mask in suit_masks:
+        if mask.bit_count() >= 5:
+            return tables["flush_values"][mask]
+
+    return tables["rank_values"][key]
+
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    """
+    Avalia em lote um array N x k (k de 5 a 7) de índices 0–51.
+    Retorna os valores das mãos (int32); maior é melhor.
+    """
+    tables = get_tables()
+    cards = np.asarray(cards, dtype=np.int64)
+    ranks = cards >> 2
+    suits = cards & 3
+
+    keys = _POW5_ARRAY[ranks].sum(axis=1)
+    values = tables["values"][np.searchsorted(tables["keys"], keys)]
+
+    bits = _BITS_ARRAY[ranks]
+    for suit in range(4):
+        in_suit = suits == suit
+        flush = in_suit.sum(axis=1) >= 5
+        if flush.any():
+            masks = (bits[flush] * in_suit[flush]).sum(axis=1)
+            values[flush] = tables["flush"][masks]
+
+    return values
+
+
+def hand_category(value: int) -> int:
+    return value >> 20
+
+
+class FastHoldemHand(StandardHighHand):
+    """
+    Mão high de hold'em avaliada pelas tabelas deste módulo, para uso
+    como hand type do pokerkit no showdown.
+    """
+
+    def __init__(self, cards, value: Optional[int] = None):
+        self._cards = Card.clean(cards)
+        self.value = value if value is not None else evaluate([CARD_INDICES[card] for card in self._cards])
+
+    @classmethod
+    def from_game(cls, hole_cards, board_cards=()) -> "FastHoldemHand":
+        if isinstance(hole_cards, str) or isinstance(board_cards, str):
+            cards = Card.clean(hole_cards) + Card.clean(board_cards)
+        else:
+            cards = (*hole_cards, *board_cards)
+            if not all(isinstance(card, Card) for card in cards):
+                cards = Card.clean(cards)
+        if not 5 <= len(cards) <= 7:
+            raise ValueError("Mão precisa de 5 a 7 cartas")
+
+        # No showdown as cartas já vêm do pokerkit: dispensa o Card.clean do __init__
+        hand = cls.__new__(cls)
+        hand._cards = cards
+        hand.value = evaluate([CARD_INDICES[card] for card in cards])
+        return hand
+
+    @property
+    def cards(self):
+        return self._cards
+
+    def __eq__(self, other: Any) -> bool:
+        if type(self) != type(other):  # noqa: E721
+            return NotImplemented
+        return self.value == other.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+    def __lt__(self, other: Any) -> bool:
+        if type(self) != type(other):  # noqa: E721
+            return NotImplemented
+        return self.value < other.value
+
+    def __str__(self) -> str:
+        return f"{CATEGORY_NAMES[hand_category(self.value)]} ({repr(self)})"
+
+
+class FastNoLimitTexasHoldem(NoLimitTexasHoldem):
+    """No-limit hold'em com showdown pelo avaliador de tabelas"""
+
+    hand_types = (FastHoldemHand,)
@@ -0,0 +1,460 @@
+"""
+Arquivo binário append-only das mãos terminadas.
+
+Cada shard escreve no próprio subdiretório (shard-N) do diretório raiz;
+cada segmento tem dois arquivos:
+  segment-NNNNNN.bin  cabeçalho MAGIC seguido dos registros (varint tamanho + payload)
+  segment-NNNNNN.idx  offset (uint64 little-endian) de cada registro no .bin
+
+Payload de uma mão: cartas como índices 0–51 (core.poker.cards), valores
+e seed do baralho como varint (zigzag para payoffs) e cada ação como um opcode de um byte
+(street << 2 | tipo) seguido da posição e do valor.
+"""
+import mmap
+import os
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from pokerkit import Automation, HandHistory, NoLimitTexasHoldem
+
+from core.poker.cards import CARDS_BY_INDEX, CODE_INDICES, CARD_CODES
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PKHA\x01"
+
+STREETS = ("pre_flop", "flop", "turn", "river")
+ACTION_TYPES = ("fold", "call", "raise")
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{6})\.bin$")
+_SHARD_RE = re.compile(r"^shard-(\d+)$")
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _to_millis(moment: datetime) -> int:
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _from_millis(millis: int) -> datetime:
+    return datetime.fromtimestamp(millis / 1000, timezone.utc).replace(tzinfo=None)
+
+
+def encode_hand(record: Dict[str, Any]) -> bytes:
+    """Serializa o registro de PokerGameSession.get_hand_record() (com room_id, hand_number e button)"""
+    out = bytearray()
+
+    room_id = record["room_id"].encode("utf-8")
+    _write_varint(out, len(room_id))
+    out += room_id
+
+    button = record.get("button")
+    _write_varint(out, record["hand_number"])
+    _write_varint(out, 0 if button is None else button + 1)
+    _write_varint(out, record["small_blind"])
+    _write_varint(out, record["big_blind"])
+    _write_varint(out, record["antes"])
+
+    started = _to_millis(record["started_at"])
+    _write_varint(out, started)
+    _write_varint(out, max(0, _to_millis(record["ended_at"]) - started))
+
+    seed = record.get("seed")
+    _write_varint(out, 0 if seed is None else seed + 1)
+
+    players = record["players"]
+    position = {}
+    out.append(len(players))
+    for player in players:
+        position[player["seat"]] = player["position"]
+        user_id = player.get("user_id")
+        _write_varint(out, player["seat"])
+        _write_varint(out, 0 if user_id is None else user_id + 1)
+        out += bytes(CODE_INDICES[card] for card in player["hole_cards"])
+        _write_varint(out, player["starting_stack"])
+        _write_varint(out, _zigzag(player["payoff"]))
+
+    out.append(len(record["board"]))
+    out += bytes(CODE_INDICES[card] for card in record["board"])
+
+    actions = record["actions"]
+    _write_varint(out, len(actions))
+    for action in actions:
+        kind = ACTION_TYPES.index(action["type"])
+        out.append(STREETS.index(action["street"]) << 2 | kind)
+        out.append(position[action["player"]])
+        if kind:
+            _write_varint(out, action["amount"] or 0)
+
+    return bytes(out)
+
+
+def decode_hand(data, pos: int = 0) -> Dict[str, Any]:
+    """Inverso de encode_hand (cartas de volta como texto, ex.: "Ah")"""
+    length, pos = _read_varint(data, pos)
+    room_id = bytes(data[pos:pos + length]).decode("utf-8")
+    pos += length
+
+    hand_number, pos = _read_varint(data, pos)
+    button, pos = _read_varint(data, pos)
+    small_blind, pos = _read_varint(data, pos)
+    big_blind, pos = _read_varint(data, pos)
+    antes, pos = _read_varint(data, pos)
+    started, pos = _read_varint(data, pos)
+    duration, pos = _read_varint(data, pos)
+    seed, pos = _read_varint(data, pos)
+
+    players = []
+    count = data[pos]
+    pos += 1
+    for index in range(count):
+        seat, pos = _read_varint(data, pos)
+        user_id, pos = _read_varint(data, pos)
+        hole_cards = [CARD_CODES[CARDS_BY_INDEX[card]] for card in data[pos:pos + 2]]
+        pos += 2
+        starting_stack, pos = _read_varint(data, pos)
+        payoff, pos = _read_varint(data, pos)
+        payoff = _unzigzag(payoff)
+        players.append({
+            "seat": seat,
+            "position": index,
+            "user_id": user_id - 1 if user_id else None,
+            "hole_cards": hole_cards,
+            "starting_stack": starting_stack,
+            "final_stack": starting_stack + payoff,
+            "payoff": payoff,
+        })
+
+    count = data[pos]
+    pos += 1
+    board = [CARD_CODES[CARDS_BY_INDEX[card]] for card in data[pos:pos + count]]
+    pos += count
+
+    actions = []
+    count, pos = _read_varint(data, pos)
+    for _ in range(count):
+        opcode = data[pos]
+        player = players[data[pos + 1]]["seat"]
+        pos += 2
+        kind = opcode & 3
+        amount = None
+        if kind:
+            amount, pos = _read_varint(data, pos)
+        actions.append({
+            "street": STREETS[opcode >> 2],
+            "type": ACTION_TYPES[kind],
+            "player": player,
+            "amount": amount,
+        })
+
+    return {
+        "room_id": room_id,
+        "hand_number": hand_number,
+        "button": button - 1 if button else None,
+        "seed": seed - 1 if seed else None,
+        "small_blind": small_blind,
+        "big_blind": big_blind,
+        "antes": antes,
+        "board": board,
+        "actions": actions,
+        "started_at": _from_millis(started),
+        "ended_at": _from_millis(started + duration),
+        "players": players,
+    }
+
+
+class HandArchive:
+    """Escrita e leitura dos segmentos de um diretório de arquivo"""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._segment: Optional[int] = None
+        self._data = None
+        self._index = None
+
+    def segments(self) -> List[int]:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def _paths(self, segment: int) -> Tuple[str, str]:
+        base = os.path.join(self.directory, f"segment-{segment:06d}")
+        return base + ".bin", base + ".idx"
+
+    # Escrita
+
+    def append_many(self, records: List[Dict[str, Any]]):
+        """Acrescenta um lote de mãos ao segmento atual (chamado fora do event loop)"""
+        if self._data is None:
+            self._open_for_append()
+
+        data = bytearray()
+        index = bytearray()
+        offset = self._data.tell()
+        for record in records:
+            payload = encode_hand(record)
+            index += offset.to_bytes(8, "little")
+            start = len(data)
+            _write_varint(data, len(payload))
+            data += payload
+            offset += len(data) - start
+
+        # Dados antes do índice: um índice nunca aponta para bytes ausentes
+        self._data.write(data)
+        self._data.flush()
+        self._index.write(index)
+        self._index.flush()
+
+        if self._data.tell() >= self.segment_bytes:
+            self._rotate()
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._index.close()
+        self._data = self._index = None
+        self._segment = None
+
+    def _open_for_append(self):
+        segments = self.segments()
+        self._segment = segments[-1] if segments else 1
+        data_path, index_path = self._paths(self._segment)
+
+        if not os.path.exists(data_path):
+            self._create(self._segment)
+            return
+
+        self._recover(data_path, index_path)
+        self._data = open(data_path, "ab")
+        self._index = open(index_path, "ab")
+
+        if self._data.tell() >= self.segment_bytes:
+            self._rotate()
+
+    def _create(self, segment: int):
+        data_path, index_path = self._paths(segment)
+        self._segment = segment
+        self._data = open(data_path, "wb")
+        self._data.write(MAGIC)
+        self._index = open(index_path, "wb")
+
+    def _rotate(self):
+        segment = self._segment + 1
+        self.close()
+        self._create(segment)
+
+    def _recover(self, data_path: str, index_path: str):
+        # Descarta o que uma escrita interrompida deixou sem índice completo
+        index_size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        index_size -= index_size % 8
+
+        end = len(MAGIC)
+        with open(index_path, "ab+") as index_file:
+            index_file.truncate(index_size)
+            if index_size:
+                index_file.seek(index_size - 8)
+                last = int.from_bytes(index_file.read(8), "little")
+                with open(data_path, "rb") as data_file:
+                    data_file.seek(last)
+                    length, used = _read_varint(data_file.read(10), 0)
+                end = last + used + length
+
+        if os.path.getsize(data_path) != end:
+            logger.warning(f"Truncating partial hand archive segment {data_path} to {end} bytes")
+            with open(data_path, "rb+") as data_file:
+                data_file.truncate(end)
+
+    # Leitura
+
+    def iter_segment(self, segment: int, raw: bool = False) -> Iterator[Any]:
+        """Percorre as mãos de um segmento via mmap, decodificando sob demanda"""
+        data_path, index_path = self._paths(segment)
+        if not os.path.getsize(index_path):
+            return
+
+        # Índice mapeado antes dos dados: todo offset visível já tem seus bytes
+        with open(index_path, "rb") as index_file, open(data_path, "rb") as data_file:
+            with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index, \
+                    mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f"Segmento inválido: {data_path}")
+
+                offsets = memoryview(index).cast("Q")
+                try:
+                    for offset in offsets:
+                        if raw:
+                            length, start = _read_varint(data, offset)
+                            yield data[offset:start + length]
+                        else:
+                            yield decode_hand(data, _read_varint(data, offset)[1])
+                finally:
+                    offsets.release()
+
+    def iter_hands(self, segments: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+        for segment in segments if segments is not None else self.segments():
+            yield from self.iter_segment(segment)
+
+    def count(self, segment: int) -> int:
+        return os.path.getsize(self._paths(segment)[1]) // 8
+
+
+def shard_directory(root: str, shard: int) -> str:
+    """Diretório do shard: cada processo é o único escritor dos seus segmentos"""
+    return os.path.join(root, f"shard-{shard}")
+
+
+class ShardedHandArchive:
+    """Leitura dos arquivos de todos os shards sob o mesmo diretório raiz"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def shards(self) -> List[int]:
+        if not os.path.isdir(self.root):
+            return []
+
+        found = []
+        for name in os.listdir(self.root):
+            match = _SHARD_RE.match(name)
+            if match and os.path.isdir(os.path.join(self.root, name)):
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def archive(self, shard: int) -> HandArchive:
+        return HandArchive(shard_directory(self.root, shard))
+
+    def segments(self) -> List[Tuple[int, int]]:
+        """(shard, segmento) de todos os shards, em ordem"""
+        return [(shard, segment) for shard in self.shards() for segment in self.archive(shard).segments()]
+
+    def select(
+        self,
+        shards: Optional[List[int]] = None,
+        segments: Optional[List[int]] = None
+    ) -> List[Tuple[int, int]]:
+        return [
+            (shard, segment) for shard, segment in self.segments()
+            if (shards is None or shard in shards) and (segments is None or segment in segments)
+        ]
+
+    def iter_segments(self, selected: List[Tuple[int, int]], raw: bool = False) -> Iterator[Any]:
+        for shard, segment in selected:
+            yield from self.archive(shard).iter_segment(segment, raw=raw)
+
+    def iter_hands(
+        self,
+        shards: Optional[List[int]] = None,
+        segments: Optional[List[int]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        yield from self.iter_segments(self.select(shards, segments))
+
+    def count(self, shard: int, segment: int) -> int:
+        return self.archive(shard).count(segment)
+
+
+@lru_cache(maxsize=128)
+def _notation_game(small_blind: int, big_blind: int, antes: int) -> NoLimitTexasHoldem:
+    # Automações padrão do HandHistory (distribuição e showdown viram ações),
+    # exceto o burn: uma carta sorteada poderia ser uma das registradas
+    automations = tuple(
+        automation
+        for automation in HandHistory.__dataclass_fields__["automations"].default
+        if automation != Automation.CARD_BURNING
+    )
+    return NoLimitTexasHoldem(
+        automations,
+        True,
+        antes,
+        (small_blind, big_blind),
+        big_blind,
+    )
+
+
+def to_hand_history(record: Dict[str, Any]) -> HandHistory:
+    """Reconstrói a mão no pokerkit e gera o HandHistory (formato PHH)"""
+    game = _notation_game(record["small_blind"], record["big_blind"], record["antes"])
+    players = record["players"]
+    state = game(tuple(player["starting_stack"] for player in players), len(players))
+
+    for player in players:
+        state.deal_hole("".join(player["hole_cards"]))
+
+    board = iter(record["board"])
+    actions = iter(record["actions"])
+
+    while state.status:
+        if state.can_burn_card():
+            state.burn_card("??")
+        elif state.can_deal_board():
+            state.deal_board("".join(next(board) for _ in range(state.street.board_dealing_count)))
+        elif state.actor_index is not None:
+            action = next(actions)
+            if action["type"] == "fold":
+                state.fold()
+            elif action["type"] == "call":
+                state.check_or_call()
+            else:
+                state.complete_bet_or_raise_to(action["amount"])
+        elif state.can_show_or_muck_hole_cards():
+            state.show_or_muck_hole_cards()
+        else:
+            raise ValueError("Mão arquivada não pode ser reconstruída")
+
+    started = record["started_at"]
+    return HandHistory.from_game_state(
+        game,
+        state,
+        table=record["room_id"],
+        hand=record["hand_number"],
+        seats=[player["seat"] + 1 for player in players],
+        players=[
+            f"user{player['user_id']}" if player["user_id"] is not None else f"seat{player['seat']}"
+            for player in players
+        ],
+        finishing_stacks=list(state.stacks),
+        year=started.year,
+        month=started.month,
+        day=started.day,
+        time=started.time().replace(microsecond=0),
+        time_zone="UTC",
+    )
+
+
+def iter_phh(hands: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Converte mãos em texto PHH, uma por vez, separadas por linha em branco"""
+    for record in hands:
+        yield to_hand_history(record).dumps() + "\n"
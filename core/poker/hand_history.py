@@ -0,0 +1,146 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from db.database import SessionLocal
+from db.models import HandHistory, HandPlayer
+
+logger = logging.getLogger(__name__)
+
+
+def write_hands(records: List[Dict[str, Any]], session_factory: Callable = SessionLocal):
+    """Insere um lote de mãos numa única transação"""
+    session = session_factory()
+    try:
+        hands = []
+        for record in records:
+            hand = HandHistory(
+                room_id=record["room_id"],
+                hand_number=record["hand_number"],
+                button=record["button"],
+                small_blind=record["small_blind"],
+                big_blind=record["big_blind"],
+                antes=record["antes"],
+                seed=record.get("seed"),
+                board=record["board"],
+                actions=record["actions"],
+                started_at=record["started_at"],
+                ended_at=record["ended_at"],
+            )
+            hands.append(hand)
+        session.add_all(hands)
+        session.flush()  # ids das mãos para as linhas de jogadores
+
+        session.add_all([
+            HandPlayer(hand_id=hand.id, **player)
+            for hand, record in zip(hands, records)
+            for player in record["players"]
+        ])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+class HandHistoryWriter:
+    """
+    Persistência write-behind das mãos terminadas: o loop do jogo só
+    enfileira o registro; uma tarefa de fundo agrupa os registros e
+    entrega cada lote (por quantidade ou janela de tempo) aos destinos
+    (banco, arquivo binário) numa thread.
+    """
+
+    def __init__(
+        self,
+        sinks: List[Callable[[List[Dict[str, Any]]], None]],
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        queue_size: int = 10000
+    ):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+            "failed": 0,
+        }
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Encerra a tarefa de fundo depois de gravar o que está na fila"""
+        if self.task is None:
+            return
+
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+
+    def submit(self, record: Dict[str, Any]):
+        """Enfileira uma mão sem bloquear; descarta se a fila estiver cheia"""
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning("Hand history queue full, dropping hand")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "queue_depth": self.queue.qsize()}
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self.queue.get()
+            if record is None:
+                return
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+
+            # Junta registros até encher o lote ou vencer a janela
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, self._write, batch)
+
+        self.stats["batches"] += 1
+        logger.debug(f"Wrote {len(batch)} hands in {time.perf_counter() - started:.3f}s")
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        # Um destino com falha não impede os demais
+        failed = False
+        for sink in self.sinks:
+            try:
+                sink(batch)
+            except Exception as e:
+                failed = True
+                logger.error(f"Error writing {len(batch)} hands to {getattr(sink, '__qualname__', sink)}: {e}")
+
+        self.stats["failed" if failed else "written"] += len(batch)
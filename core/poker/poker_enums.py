@@ -15,4 +15,8 @@ class GamePhase(Enum):
     TURN = "turn"
     RIVER = "river"
     SHOWDOWN = "showdown"
-    
+
+
+class CardEncoding(Enum):
+    TEXT = "text"
+    INT = "int"
@@ -3,17 +3,77 @@ from pokerkit import (
     NoLimitTexasHoldem,
     State,
     Hand,
-    CheckingOrCalling,
-    Folding,
-    CompletionBettingOrRaisingTo
 )
 from typing import Optional, List, Dict, Any, Tuple
+from functools import lru_cache
+from datetime import datetime
+import time
 import logging
 
-from core.poker.poker_enums import PokerAction, GamePhase
+from core.poker.poker_enums import PokerAction, GamePhase, CardEncoding
+from core.poker.cards import CARD_CODES, CARD_INDICES, card_table
+from core.poker.equity import calculate_equity
+from core.poker.evaluator import FastNoLimitTexasHoldem
+from core.poker.deck import create_state, deal_pending
+from core.poker.state_delta import diff_game_state
+from core.metrics import STATE_BUILD_SECONDS, STATE_CACHE_HITS
+from core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+# Cartas no board ao final de cada street
+STREET_BOARD_COUNTS = {
+    GamePhase.PRE_FLOP.value: 0,
+    GamePhase.FLOP.value: 3,
+    GamePhase.TURN.value: 4,
+    GamePhase.RIVER.value: 5,
+}
+
+
+AUTOMATIONS = (
+    Automation.ANTE_POSTING,
+    Automation.BET_COLLECTION,
+    Automation.BLIND_OR_STRADDLE_POSTING,
+    Automation.CARD_BURNING,
+    Automation.HOLE_DEALING,
+    Automation.BOARD_DEALING,
+    Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
+    Automation.HAND_KILLING,
+    Automation.CHIPS_PUSHING,
+    Automation.CHIPS_PULLING,
+)
+
+# Baralho com seed: burn e distribuições feitos por deal_pending
+SEEDED_AUTOMATIONS = tuple(
+    automation for automation in AUTOMATIONS
+    if automation not in (Automation.CARD_BURNING, Automation.HOLE_DEALING, Automation.BOARD_DEALING)
+)
+
+
+@lru_cache(maxsize=128)
+def get_game_definition(
+    small_blind: int,
+    big_blind: int,
+    antes: int = 0,
+    min_bet: Optional[int] = None,
+    fast_evaluator: bool = False,
+    seeded: bool = False
+) -> NoLimitTexasHoldem:
+    """
+    Definição imutável do jogo, compartilhada por todas as mesas
+    com os mesmos blinds, antes e aposta mínima. Com fast_evaluator,
+    o showdown usa o avaliador de tabelas em vez do StandardHighHand;
+    com seeded, as cartas são distribuídas de um baralho com seed.
+    """
+    game_type = FastNoLimitTexasHoldem if fast_evaluator else NoLimitTexasHoldem
+    return game_type(
+        SEEDED_AUTOMATIONS if seeded else AUTOMATIONS,
+        True,
+        antes,
+        (small_blind, big_blind),
+        big_blind if min_bet is None else min_bet,
+    )
+
 
 class PokerGameSession:
     def __init__(
@@ -22,39 +82,45 @@ class PokerGameSession:
         starting_stacks: Tuple[int, ...],
         small_blind: int = 50,
         big_blind: int = 100,
+        card_encoding: CardEncoding = CardEncoding.TEXT,
+        antes: int = 0,
+        seats: Optional[Tuple[int, ...]] = None,
+        version: int = 0,
+        fast_evaluator: bool = False,
+        seed: Optional[int] = None,
     ):
         self.player_count = player_count
         self.starting_stacks = starting_stacks
         self.small_blind = small_blind
         self.big_blind = big_blind
+        self.antes = antes
         self.min_bet = big_blind
+        self.card_encoding = card_encoding
+        self._card_table = card_table(card_encoding)
 
-        self.game_config = {
-            "automations": (
-                Automation.ANTE_POSTING,
-                Automation.BET_COLLECTION,
-                Automation.BLIND_OR_STRADDLE_POSTING,
-                Automation.CARD_BURNING,
-                Automation.HOLE_DEALING,
-                Automation.BOARD_DEALING,
-                Automation.HOLE_CARDS_SHOWING_OR_MUCKING,
-                Automation.HAND_KILLING,
-                Automation.CHIPS_PUSHING,
-                Automation.CHIPS_PULLING,
-            ),
-            "ante_trimming_status": True,
-            "raw_antes": 0,
-            "raw_blinds_or_straddles": (self.small_blind, self.big_blind),
-            "min_bet": self.min_bet,
-        }
+        # Assento (id do jogador na mesa) de cada posição da mão;
+        # a posição 0 é o small blind e a última é o botão
+        self.seats = seats if seats is not None else tuple(range(player_count))
+        self._seat_index = {seat: index for index, seat in enumerate(self.seats)}
 
-        self.game = NoLimitTexasHoldem(**self.game_config)
+        # Com seed a mão é reproduzível (core.poker.replay)
+        self.seed = seed
+        self.game = get_game_definition(
+            small_blind, big_blind, antes, self.min_bet, fast_evaluator, seed is not None
+        )
+        self.state = create_state(self.game, self.starting_stacks, self.player_count, seed)
 
-        self.state = self.game.create_state(
-    **self.game_config,
-    raw_starting_stacks=self.starting_stacks,
-    player_count=self.player_count
-)
+        # Cópia das cartas distribuídas (o showdown pode descartar as perdedoras)
+        self.dealt_hole_cards = [list(cards) for cards in self.state.hole_cards]
+
+        # Histórico compacto da mão, registrado a cada jogada
+        self.action_log: List[Dict[str, Any]] = []
+        self.started_at = datetime.utcnow()
+
+        # Versão do estado, incrementada a cada transição
+        self.version = version
+        self._public_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        self._published_state = self.get_public_state()
 
     def process_move(self, player_id: int, move: str, amount: int = 0) -> Dict[str, Any]:
         if not self.state:
@@ -63,7 +129,7 @@ class PokerGameSession:
         if not self.state.status:
             return {"success": False, "error": "Mão atual já terminou"}
 
-        current_player = self.state.actor_index
+        current_player = self.get_current_player()
 
         if current_player != player_id:
             return {
@@ -71,17 +137,23 @@ class PokerGameSession:
                 "error": f"Não é seu turno. Turno do jogador {current_player}"
             }
 
+        index = self._seat_index[player_id]
+
+        street = self._get_current_phase().value
+
         try:
             if move in ["check", "call"]:
-                self.state.check_or_call()
+                operation = self.state.check_or_call()
+                self._record_action(street, "call", player_id, operation.amount)
                 logger.info(f"Player {player_id} checked/called")
 
             elif move == "fold":
                 self.state.fold()
+                self._record_action(street, "fold", player_id, None)
                 logger.info(f"Player {player_id} folded")
 
             elif move in ["bet", "raise"]:
-                player_stack = self.state.stacks[player_id]
+                player_stack = self.state.stacks[index]
                 if amount > player_stack or amount <= 0:
                     return {
                         "success": False,
@@ -95,12 +167,17 @@ class PokerGameSession:
                         "error": f"Valor mínimo para raise é {min_raise}"
                     }
 
-                self.state.complete_bet_or_raise_to(amount)
+                operation = self.state.complete_bet_or_raise_to(amount)
+                self._record_action(street, "raise", player_id, operation.amount)
                 logger.info(f"Player {player_id} raised to {amount}")
 
             else:
                 return {"success": False, "error": f"Ação inválida: {move}"}
 
+            if self.seed is not None:
+                deal_pending(self.state)
+
+            self.version += 1
             return {"success": True}
 
         except Exception as e:
@@ -111,35 +188,64 @@ class PokerGameSession:
         if not self.state:
             return {"phase": "waiting", "message": "Aguardando início do jogo"}
 
+        public_state = self.get_public_state()
+
+        if player_id not in self._seat_index:
+            return public_state
+
+        hole_cards = self.state.hole_cards[self._seat_index[player_id]]
+        if not hole_cards:
+            return public_state
+
+        # Visão individual: cópia rasa do estado público + cartas do jogador
+        state = dict(public_state)
+        state["hole_cards"] = [self._card_table[card] for card in hole_cards]
+        return state
+
+    def get_public_state(self) -> Dict[str, Any]:
+        """
+        Estado público da mesa, reconstruído apenas quando a versão muda.
+        O dict retornado é compartilhado e não deve ser modificado.
+        """
+        if self._public_cache is not None and self._public_cache[0] == self.version:
+            STATE_CACHE_HITS.inc()
+            return self._public_cache[1]
+
+        started = time.perf_counter()
         phase = self._get_current_phase()
         pots = self._calculate_pots()
 
         state = {
+            "version": self.version,
             "phase": phase.value,
             "pot": pots["total"],
             "pots": pots,
             "board_cards": [
-                str(card).split("(")[1][:-1]
+                self._card_table[card]
                 for group in self.state.board_cards
                 for card in group
             ],
             "players": self._get_players_info(),
-            "current_player": self.state.actor_index,
+            "current_player": self._actor_seat(),
             "min_raise": self.state.min_completion_betting_or_raising_to_amount,
             "active": self.state.status,
             "last_action": self._get_last_action()
         }
 
-        if player_id is not None and 0 <= player_id < self.player_count:
-            hole_cards = self.state.hole_cards[player_id]
-            if hole_cards:
-                state["hole_cards"] = [
-                    str(card).split("(")[-1][:-1]
-                    for card in hole_cards
-                ]
-
+        self._public_cache = (self.version, state)
+        finished = time.perf_counter()
+        STATE_BUILD_SECONDS.observe(finished - started)
+        if tracer.enabled:
+            tracer.record("state_build", "engine", started, finished, args={"version": self.version})
         return state
 
+    def get_state_delta(self) -> Dict[str, Any]:
+        """Retorna as mudanças do estado público desde o último delta emitido"""
+        current = self.get_public_state()
+        delta = diff_game_state(self._published_state, current)
+        self._published_state = current
+        return delta
+
     def _get_current_phase(self) -> GamePhase:
         if not self.state:
             return GamePhase.PRE_FLOP
@@ -178,10 +284,10 @@ class PokerGameSession:
     def _get_players_info(self) -> List[Dict[str, Any]]:
         players = []
 
-        for i in range(self.player_count):
+        for i, seat in enumerate(self.seats):
             if not self.state:
                 players.append({
-                    "id": i,
+                    "id": seat,
                     "stack": self.starting_stacks[i],
                     "bet": 0,
                     "folded": True
@@ -189,7 +295,7 @@ class PokerGameSession:
                 continue
 
             players.append({
-                "id": i,
+                "id": seat,
                 "stack": self.state.stacks[i],
                 "bet": self.state.bets[i],
                 "folded": not self.state.statuses[i]
@@ -197,33 +303,33 @@ class PokerGameSession:
 
         return players
 
-    def _get_last_action(self):
-        if not self.state or not self.state.operations:
-            return None
+    def _record_action(self, street: str, action: str, player_id: int, amount: Optional[int]):
+        self.action_log.append({
+            "street": street,
+            "type": action,
+            "player": player_id,
+            "amount": amount
+        })
 
-        action_map = {
-            CheckingOrCalling: "call",
-            Folding: "fold",
-            CompletionBettingOrRaisingTo: "raise"
-        }
+    def _get_last_action(self):
+        return self.action_log[-1] if self.action_log else None
 
-        for op in reversed(self.state.operations):
-            for action_class, name in action_map.items():
-                if isinstance(op, action_class):
-                    return {
-                        "type": name,
-                        "player": getattr(op, "player_index", None),
-                        "amount": getattr(op, "amount", None)
-                    }
+    def get_actions(self, since: int = 0) -> List[Dict[str, Any]]:
+        """Ações da mão a partir do índice informado (para streaming incremental)"""
+        return self.action_log[since:]
 
-        return None
+    def _actor_seat(self) -> Optional[int]:
+        actor_index = self.state.actor_index
+        if actor_index is None:
+            return None
+        return self.seats[actor_index]
 
     def get_current_player(self):
         if not self.state:
             return None
         if not self.state.status:
             return None
-        return self.state.actor_index
+        return self._actor_seat()
 
     def is_hand_complete(self) -> bool:
         if not self.state:
@@ -236,26 +342,142 @@ class PokerGameSession:
             return {"message": "Mão ainda não terminou"}
 
         result = []
-        for i in range(self.player_count):
+        for i, seat in enumerate(self.seats):
             stacks_payoffs = self.state.payoffs[i]
             final_stacks = self.state.stacks[i]
 
             result.append({
-                "id": i,
+                "id": seat,
                 "stacks_payoffs": stacks_payoffs,
                 "final_stacks": final_stacks
             })
 
         return result
 
+    def get_allin_equity(self, samples: int = 5000) -> Optional[Dict[str, Any]]:
+        """
+        Equity de cada jogador no momento do all-in: a mão terminou com o
+        board ainda incompleto na última ação e dois ou mais na disputa.
+        """
+        if not self.state or self.state.status or not self.action_log:
+            return None
+
+        board_count = STREET_BOARD_COUNTS.get(self.action_log[-1]["street"], 5)
+        if board_count == 5:
+            return None
+
+        folded = {entry["player"] for entry in self.action_log if entry["type"] == "fold"}
+        contenders = [i for i, seat in enumerate(self.seats) if seat not in folded]
+        if len(contenders) < 2:
+            return None
+
+        board = [card for group in self.state.board_cards for card in group][:board_count]
+        result = calculate_equity(
+            [[CARD_INDICES[card] for card in self.dealt_hole_cards[i]] for i in contenders],
+            [CARD_INDICES[card] for card in board],
+            samples
+        )
+
+        return {
+            "board_cards": [self._card_table[card] for card in board],
+            "method": result["method"],
+            "players": [
+                {"id": self.seats[i], **player}
+                for i, player in zip(contenders, result["players"])
+            ]
+        }
+
+    def get_hand_record(self) -> Optional[Dict[str, Any]]:
+        """Registro completo da mão terminada, no formato do histórico persistido"""
+        if not self.state or self.state.status:
+            return None
+
+        return {
+            "seed": self.seed,
+            "small_blind": self.small_blind,
+            "big_blind": self.big_blind,
+            "antes": self.antes,
+            "board": [CARD_CODES[card] for group in self.state.board_cards for card in group],
+            "actions": list(self.action_log),
+            "started_at": self.started_at,
+            "ended_at": datetime.utcnow(),
+            "players": [
+                {
+                    "seat": seat,
+                    "position": i,
+                    "hole_cards": [CARD_CODES[card] for card in self.dealt_hole_cards[i]],
+                    "starting_stack": self.starting_stacks[i],
+                    "final_stack": self.state.stacks[i],
+                    "payoff": self.state.payoffs[i],
+                }
+                for i, seat in enumerate(self.seats)
+            ],
+        }
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """
+        Mão serializável (JSON) para snapshot da sala: seed do baralho e
+        ações, reaplicadas na restauração. Exige baralho com seed.
+        """
+        if self.seed is None:
+            raise ValueError("Mão sem seed não pode ser salva em snapshot")
+
+        return {
+            "seed": self.seed,
+            "seats": list(self.seats),
+            "starting_stacks": list(self.starting_stacks),
+            "start_version": self.version - len(self.action_log),
+            "actions": [dict(action) for action in self.action_log],
+            "started_at": self.started_at.isoformat(),
+        }
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: Dict[str, Any],
+        small_blind: int,
+        big_blind: int,
+        card_encoding: CardEncoding = CardEncoding.TEXT,
+        antes: int = 0,
+        fast_evaluator: bool = False,
+    ) -> "PokerGameSession":
+        """Reconstrói a mão de um snapshot de to_snapshot()"""
+        if snapshot.get("seed") is None:
+            raise ValueError("Snapshot de mão sem seed")
+
+        session = cls(
+            player_count=len(snapshot["seats"]),
+            starting_stacks=tuple(snapshot["starting_stacks"]),
+            small_blind=small_blind,
+            big_blind=big_blind,
+            card_encoding=card_encoding,
+            antes=antes,
+            seats=tuple(snapshot["seats"]),
+            version=snapshot["start_version"],
+            fast_evaluator=fast_evaluator,
+            seed=snapshot["seed"],
+        )
+
+        # Reaplica as ações sobre o mesmo baralho
+        for action in snapshot["actions"]:
+            result = session.process_move(action["player"], action["type"], action["amount"] or 0)
+            if not result["success"]:
+                raise ValueError(f"Snapshot inconsistente: {result['error']}")
+
+        session.started_at = datetime.fromisoformat(snapshot["started_at"])
+        session._public_cache = None
+        session._published_state = session.get_public_state()
+        return session
+
     def show_cards(self, player_id: int):
         if not self.state or self.state.status:
             return {"message": "Mão ainda não terminou"}
 
-        if not 0 <= player_id < self.player_count:
+        if player_id not in self._seat_index:
             return {"message": "Player invalido"}
 
-        return self.state.hole_cards[player_id]
+        hole_cards = self.state.hole_cards[self._seat_index[player_id]]
+        return [self._card_table[card] for card in hole_cards]
         
     
     
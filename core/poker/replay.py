@@ -0,0 +1,139 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from pokerkit import HoleDealing, State
+
+from core.poker.cards import CARD_CODES
+from core.poker.deck import create_state, deal_pending
+from core.poker.poker_session import get_game_definition
+
+
+def apply_action(state: State, action: Dict[str, Any]):
+    """Aplica uma entrada do action_log e faz as distribuições que ela liberar"""
+    if action["type"] == "fold":
+        state.fold()
+    elif action["type"] == "call":
+        operation = state.check_or_call()
+        if action["amount"] is not None and operation.amount != action["amount"]:
+            raise ValueError(f"Call de {operation.amount}, registrado {action['amount']}")
+    elif action["type"] == "raise":
+        state.complete_bet_or_raise_to(action["amount"])
+    else:
+        raise ValueError(f"Ação inválida: {action['type']}")
+
+    deal_pending(state)
+
+
+def replay_state(record: Dict[str, Any], index: Optional[int] = None, fast_evaluator: bool = True) -> State:
+    """
+    Reconstrói o State exato da mão (registro de get_hand_record) depois
+    das `index` primeiras ações; sem index, até o fim da mão.
+    """
+    if record.get("seed") is None:
+        raise ValueError("Mão sem seed não pode ser reproduzida")
+
+    game = get_game_definition(
+        record["small_blind"],
+        record["big_blind"],
+        record["antes"],
+        None,
+        fast_evaluator,
+        True
+    )
+    players = record["players"]
+    state = create_state(
+        game,
+        tuple(player["starting_stack"] for player in players),
+        len(players),
+        record["seed"]
+    )
+
+    actions = record["actions"] if index is None else record["actions"][:index]
+    for action in actions:
+        apply_action(state, action)
+
+    return state
+
+
+def verify_hand(record: Dict[str, Any], fast_evaluator: bool = True) -> Optional[str]:
+    """Reexecuta a mão e compara com o registro; retorna a divergência ou None"""
+    try:
+        state = replay_state(record, fast_evaluator=fast_evaluator)
+    except Exception as e:
+        return f"replay falhou: {e}"
+
+    if state.status:
+        return "mão não terminou no replay"
+
+    dealt = [[] for _ in record["players"]]
+    for operation in state.operations:
+        if isinstance(operation, HoleDealing):
+            dealt[operation.player_index].extend(CARD_CODES[card] for card in operation.cards)
+
+    board = [CARD_CODES[card] for group in state.board_cards for card in group]
+
+    for position, player in enumerate(record["players"]):
+        if dealt[position] != player["hole_cards"]:
+            return f"cartas do assento {player['seat']} divergem"
+        if state.stacks[position] != player["final_stack"]:
+            return f"stack final do assento {player['seat']} diverge"
+
+    if board != record["board"]:
+        return "board diverge"
+
+    return None
+
+
+def _verify_chunk(records: List[Dict[str, Any]]) -> List[Optional[str]]:
+    return [verify_hand(record) for record in records]
+
+
+def audit_hands(
+    records: Iterable[Dict[str, Any]],
+    workers: int = 1,
+    chunk_size: int = 500
+) -> Dict[str, Any]:
+    """
+    Reexecuta em lote mãos com seed (do banco ou do arquivo binário) e
+    lista as que divergem do registrado. Com workers > 1, os lotes são
+    distribuídos entre processos.
+    """
+    started = time.perf_counter()
+    skipped = 0
+    chunks: List[List[Dict[str, Any]]] = [[]]
+
+    for record in records:
+        if record.get("seed") is None:
+            skipped += 1
+            continue
+        if len(chunks[-1]) >= chunk_size:
+            chunks.append([])
+        chunks[-1].append(record)
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_verify_chunk, chunks))
+    else:
+        results = [_verify_chunk(chunk) for chunk in chunks]
+
+    verified = 0
+    mismatches = []
+    for chunk, errors in zip(chunks, results):
+        for record, error in zip(chunk, errors):
+            verified += 1
+            if error is not None:
+                mismatches.append({
+                    "room_id": record.get("room_id"),
+                    "hand_number": record.get("hand_number"),
+                    "error": error,
+                })
+
+    elapsed = time.perf_counter() - started
+    return {
+        "verified": verified,
+        "skipped": skipped,
+        "mismatches": mismatches,
+        "elapsed": elapsed,
+        "hands_per_second": verified / elapsed if elapsed else 0.0,
+    }
@@ -0,0 +1,455 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Optional
+import logging
+
+from fastapi import WebSocket
+
+from core.config import settings
+from core.metrics import MOVE_SECONDS, MOVE_ERRORS
+from core.tracing import current_lane, tracer
+from core.poker.engine_pool import EnginePool
+from core.poker.hand_history import HandHistoryWriter
+from core.websocket.frames import Frame
+
+logger = logging.getLogger(__name__)
+
+# Ações aceitas como label de métrica; o resto vira "invalid"
+MOVE_ACTIONS = frozenset({"check", "call", "fold", "bet", "raise"})
+
+
+class RoomActor:
+    """
+    Tarefa única por sala que consome a fila de comandos (join, start,
+    move, get_state, get_actions, leave) em ordem e publica os resultados no
+    ConnectionManager da sala.
+    """
+
+    def __init__(
+        self,
+        room_id: str,
+        room: dict,
+        on_empty: Optional[Callable[[str], None]] = None,
+        engine_pool: Optional[EnginePool] = None,
+        hand_history: Optional[HandHistoryWriter] = None
+    ):
+        self.room_id = room_id
+        self.room = room
+        self.on_empty = on_empty
+        self.engine_pool = engine_pool
+        self.hand_history = hand_history
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+        # Incrementada a cada comando que altera a sala (snapshots incrementais)
+        self.revision = 0
+        # Em drain: sem novas mãos e quem sai mantém o assento reservado
+        self.draining = False
+
+        self.stats = {
+            "processed": 0,
+            "max_queue_depth": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+        }
+
+        self._mutating = {"join", "start", "move", "leave"}
+        self._handlers: Dict[str, Callable] = {
+            "join": self._handle_join,
+            "start": self._handle_start,
+            "move": self._handle_move,
+            "get_state": self._handle_get_state,
+            "get_actions": self._handle_get_actions,
+            "leave": self._handle_leave,
+        }
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task and self.task is not asyncio.current_task():
+            self.task.cancel()
+        self.task = None
+        self._release_pending()
+
+    async def submit(self, websocket: WebSocket, user: Any, data: dict):
+        """Enfileira um comando recebido do cliente"""
+        self.queue.put_nowait((websocket, user, data, time.perf_counter()))
+
+        depth = self.queue.qsize()
+        if depth > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = depth
+
+    async def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Executa fn entre dois comandos da fila (visão consistente da sala);
+        se fn devolver um awaitable, a fila espera por ele. Retorna None se
+        a sala for encerrada antes.
+        """
+        if self.task is None:
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((None, None, (fn, future), time.perf_counter()))
+        return await future
+
+    async def query(self, fn: Callable, *args) -> Any:
+        """
+        Executa fn(*args) fora do event loop entre dois comandos da fila, sem
+        concorrer com as jogadas. Retorna None se a sala for encerrada antes.
+        """
+        return await self.call(lambda: self._run_offloaded(fn, *args))
+
+    def _release_pending(self):
+        # Comandos internos ainda na fila não serão executados
+        while not self.queue.empty():
+            websocket, _, data, _ = self.queue.get_nowait()
+            if websocket is None and not data[1].done():
+                data[1].set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        processed = self.stats["processed"]
+        return {
+            **self.stats,
+            "queue_depth": self.queue.qsize(),
+            "avg_latency": self.stats["total_latency"] / processed if processed else 0.0,
+        }
+
+    async def _run(self):
+        # Spans de tracing desta tarefa ficam na trilha da sala
+        current_lane.set(f"room {self.room_id}")
+
+        while True:
+            websocket, user, data, enqueued_at = await self.queue.get()
+
+            if websocket is None:
+                fn, future = data
+                if not future.done():
+                    try:
+                        result = fn()
+                        if inspect.isawaitable(result):
+                            result = await result
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+                continue
+
+            action = data.get("action") if isinstance(data, dict) else None
+            handler = self._handlers.get(action)
+            tracing = tracer.enabled
+            if tracing:
+                started = time.perf_counter()
+            if handler is not None:
+                try:
+                    await handler(websocket, user, data)
+                except Exception as e:
+                    logger.error(f"Error handling room command in {self.room_id}: {e}")
+
+            if action in self._mutating:
+                self.revision += 1
+
+            finished = time.perf_counter()
+            latency = finished - enqueued_at
+            if tracing:
+                tracer.record("queue", "room", enqueued_at, started)
+                tracer.record(action or "unknown", "room", started, finished, args={"room": self.room_id})
+
+            self.stats["processed"] += 1
+            self.stats["total_latency"] += latency
+            if latency > self.stats["max_latency"]:
+                self.stats["max_latency"] = latency
+
+            if handler == self._handle_leave and self._is_empty() and not self.draining:
+                if self.on_empty:
+                    self.on_empty(self.room_id)
+                self._release_pending()
+                return
+
+    async def _run_engine(self, fn: Callable, *args) -> Any:
+        # Lógica pokerkit: no worker fixo da sala quando há pool, senão inline
+        if tracer.enabled:
+            with tracer.span("engine", "engine", fn=fn.__name__, pooled=self.engine_pool is not None):
+                if self.engine_pool is None:
+                    return fn(*args)
+                return await self.engine_pool.run(self.room_id, fn, *args)
+
+        if self.engine_pool is None:
+            return fn(*args)
+        return await self.engine_pool.run(self.room_id, fn, *args)
+
+    async def _run_offloaded(self, fn: Callable, *args) -> Any:
+        # Cálculo pesado (Monte Carlo): nunca inline, mesmo sem engine pool
+        if self.engine_pool is None:
+            return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        return await self.engine_pool.run(self.room_id, fn, *args)
+
+    def _is_empty(self) -> bool:
+        room = self.room
+        return not room["players"] and not room["reserved"] and not room["connection_manager"].active_connections
+
+    def _free_seat(self) -> int:
+        # Assento de quem saiu no meio da mão só volta a ficar livre na liquidação
+        taken = {info["player_id"] for info in self.room["players"].values()}
+        taken |= {info["player_id"] for info in self.room["reserved"].values()}
+        taken |= self.room["table"].seats_in_use()
+        seat = 0
+        while seat in taken:
+            seat += 1
+        return seat
+
+    async def _handle_join(self, websocket: WebSocket, user: Any, data: dict):
+        room = self.room
+        conn_manager = room["connection_manager"]
+        chips = data.get("chips", 1000)
+
+        # Sala restaurada de snapshot: o usuário retoma o assento reservado
+        reserved = room["reserved"].pop(user.id, None)
+        if reserved is not None:
+            player_id = reserved["player_id"]
+            room["players"][websocket] = reserved
+        else:
+            player_id = self._free_seat()
+            room["players"][websocket] = {
+                "player_id": player_id,
+                "chips": chips,
+                "user_id": user.id,
+                "username": user.username
+            }
+            room["table"].sit(player_id, chips)
+
+        await conn_manager.send_to(websocket, {
+            "type": "joined",
+            "player_id": player_id,
+            "players_count": len(room["players"])
+        })
+
+        await conn_manager.broadcast_except(websocket, {
+            "type": "player_joined",
+            "player_id": player_id,
+            "players_count": len(room["players"])
+        })
+
+        # Snapshot completo para quem entra com o jogo em andamento
+        if room["game_session"]:
+            await conn_manager.send_to(websocket, {
+                "type": "state",
+                "state": room["game_session"].get_game_state(player_id)
+            })
+
+    async def _handle_start(self, websocket: WebSocket, user: Any, data: dict):
+        room = self.room
+        conn_manager = room["connection_manager"]
+
+        if len(room["players"]) < 2:
+            await conn_manager.send_to(websocket, {
+                "type": "error",
+                "message": "Mínimo de 2 jogadores necessário"
+            })
+            return
+
+        first_player = next(iter(room["players"].values()))
+        if first_player["player_id"] != 0:
+            await conn_manager.send_to(websocket, {
+                "type": "error",
+                "message": "Apenas o primeiro jogador pode iniciar a partida"
+            })
+            return
+
+        if self.draining:
+            await conn_manager.send_to(websocket, {
+                "type": "error",
+                "message": "Servidor reiniciando; a próxima mão começa após o restart"
+            })
+            return
+
+        can_start, message = room["table"].can_start_hand()
+        if not can_start:
+            await conn_manager.send_to(websocket, {
+                "type": "error",
+                "message": message
+            })
+            return
+
+        # Próxima mão da mesa: botão girado e stacks da mão anterior
+        session, frame = await self._run_engine(self._start_hand)
+        room["game_session"] = session
+
+        await conn_manager.broadcast(frame)
+
+    async def _handle_move(self, websocket: WebSocket, user: Any, data: dict):
+        room = self.room
+        conn_manager = room["connection_manager"]
+        session = room["game_session"]
+        if not session:
+            return
+
+        player_info = room["players"].get(websocket)
+        if not player_info:
+            return
+
+        current_player = session.get_current_player()
+        if current_player != player_info["player_id"]:
+            await conn_manager.send_to(websocket, {
+                "type": "error",
+                "message": "Não é seu turno"
+            })
+            return
+
+        move = data.get("move")
+        amount = data.get("amount", 0)
+
+        try:
+            error, frame = await self._run_engine(
+                self._apply_move, session, player_info["player_id"], move, amount
+            )
+
+            if error is None:
+                await conn_manager.broadcast(frame)
+                if session.is_hand_complete():
+                    self._record_hand(session)
+                    if settings.POKER_SHOWDOWN_EQUITY:
+                        await self._broadcast_equity(session)
+            else:
+                await conn_manager.send_to(websocket, {
+                    "type": "error",
+                    "message": error
+                })
+
+        except Exception as e:
+            logger.error(f"Error processing move: {e}")
+            await conn_manager.send_to(websocket, {
+                "type": "error",
+                "message": "Erro interno ao processar jogada"
+            })
+
+    def _start_hand(self):
+        table = self.room["table"]
+        session = table.start_hand()
+
+        frame = Frame.encode({
+            "type": "game_started",
+            "hand_number": table.hand_number,
+            "button": table.button,
+            "state": session.get_game_state()
+        })
+        return session, frame
+
+    def _apply_move(self, session, player_id: int, move: str, amount: int):
+        # Roda no worker: aplica a jogada e já devolve o frame serializado
+        started = time.perf_counter()
+        move_result = session.process_move(
+            player_id=player_id,
+            move=move,
+            amount=amount
+        )
+        action = move if move in MOVE_ACTIONS else "invalid"
+        MOVE_SECONDS.labels(action).observe(time.perf_counter() - started)
+
+        if not move_result["success"]:
+            MOVE_ERRORS.labels(action).inc()
+            return move_result["error"], None
+
+        if session.is_hand_complete():
+            return None, Frame.encode({
+                "type": "hand_complete",
+                "state": session.get_game_state(),
+                "result": session.get_hand_result()
+            })
+
+        return None, Frame.encode({
+            "type": "delta",
+            "delta": session.get_state_delta()
+        })
+
+    async def _broadcast_equity(self, session):
+        # Equity do all-in só depois do hand_complete e fora do event loop
+        equity = await self._run_offloaded(session.get_allin_equity, settings.EQUITY_SAMPLES)
+        if equity is None:
+            return
+
+        await self.room["connection_manager"].broadcast({
+            "type": "showdown_equity",
+            "hand_number": self.room["table"].hand_number,
+            "equity": equity
+        })
+
+    def _record_hand(self, session):
+        if self.hand_history is None:
+            return
+
+        record = session.get_hand_record()
+        if record is None:
+            return
+
+        table = self.room["table"]
+        user_ids = {info["player_id"]: info["user_id"] for info in self.room["players"].values()}
+        for player in record["players"]:
+            player["user_id"] = user_ids.get(player["seat"])
+
+        record.update(room_id=self.room_id, hand_number=table.hand_number, button=table.button)
+        self.hand_history.submit(record)
+
+    async def _handle_get_state(self, websocket: WebSocket, user: Any, data: dict):
+        session = self.room["game_session"]
+        if not session:
+            return
+
+        player_info = self.room["players"].get(websocket)
+        player_id = player_info["player_id"] if player_info else None
+
+        await self.room["connection_manager"].send_to(websocket, {
+            "type": "state",
+            "state": session.get_game_state(player_id)
+        })
+
+    async def _handle_get_actions(self, websocket: WebSocket, user: Any, data: dict):
+        # Log da mão atual a partir de "since": o cliente acompanha sem reler tudo
+        session = self.room["game_session"]
+        if not session:
+            return
+
+        since = data.get("since", 0)
+        if not isinstance(since, int) or since < 0:
+            since = 0
+
+        await self.room["connection_manager"].send_to(websocket, {
+            "type": "actions",
+            "hand_number": self.room["table"].hand_number,
+            "since": since,
+            "actions": session.get_actions(since)
+        })
+
+    def resync_state(self, websocket: WebSocket) -> Optional[dict]:
+        """State completo da conexão, enviado no lugar de states/deltas coalescidos"""
+        session = self.room["game_session"]
+        if not session:
+            return None
+
+        player_info = self.room["players"].get(websocket)
+        player_id = player_info["player_id"] if player_info else None
+        return {"type": "state", "state": session.get_game_state(player_id)}
+
+    async def _handle_leave(self, websocket: WebSocket, user: Any, data: dict):
+        room = self.room
+
+        # "restart" só vale para o leave do próprio endpoint, já desconectado
+        restart = data.get("restart") is True and websocket not in room["connection_manager"].active_connections
+
+        player_info = room["players"].pop(websocket, None)
+        if player_info:
+            if self.draining or restart:
+                # Desconexão do restart: o assento segue no snapshot
+                room["reserved"][player_info["user_id"]] = player_info
+            else:
+                room["table"].leave(player_info["player_id"])
+
+        if room["players"]:
+            await room["connection_manager"].broadcast({
+                "type": "player_left",
+                "players_count": len(room["players"])
+            })
@@ -1,25 +1,258 @@
-from typing import Dict, Optional, Any
+import asyncio
+from typing import Dict, List, Optional, Any
 from core.websocket.ws import ConnectionManager
 from core.poker.poker_session import PokerGameSession
+from core.poker.table import PokerTable
+from core.poker.room_actor import RoomActor
+from core.poker.engine_pool import EnginePool
+from core.poker.hand_history import HandHistoryWriter, write_hands
+from core.poker.hand_archive import HandArchive, shard_directory
+from core.poker.snapshot import SnapshotStore, build_snapshot, restore_room
+from core.config import settings
+from core.sharding.shard import ShardContext, get_shard
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class GameRoomManager:
     def __init__(self):
         self.rooms: dict[str, dict] = {}  
+
+        # Opcional: lógica pokerkit fora do event loop, uma thread fixa por sala
+        self.engine_pool: Optional[EnginePool] = None
+        if settings.POKER_ENGINE_WORKERS > 0:
+            self.engine_pool = EnginePool(settings.POKER_ENGINE_WORKERS)
+
+        # Mãos terminadas gravadas em lote, fora do caminho do jogo
+        sinks = []
+        if settings.HAND_HISTORY_ENABLED:
+            sinks.append(write_hands)
+
+        # Aberto em start(): o diretório depende do shard deste processo
+        self.hand_archive: Optional[HandArchive] = None
+        if settings.HAND_ARCHIVE_ENABLED:
+            sinks.append(self._archive_hands)
+
+        self.hand_history: Optional[HandHistoryWriter] = None
+        if sinks:
+            self.hand_history = HandHistoryWriter(
+                sinks,
+                batch_size=settings.HAND_HISTORY_BATCH_SIZE,
+                flush_interval=settings.HAND_HISTORY_FLUSH_INTERVAL,
+                queue_size=settings.HAND_HISTORY_QUEUE_SIZE
+            )
+
+        # Salas de todos os shards (room_id -> shard), mantido pelo barramento
+        self.lobby: Dict[str, int] = {}
+
+        # Snapshots das salas: restauradas sob demanda quando um cliente volta
+        self.snapshot_store: Optional[SnapshotStore] = None
+        if settings.SNAPSHOT_ENABLED:
+            self.snapshot_store = SnapshotStore(settings.SNAPSHOT_DIR)
+        self._snapshot_revisions: Dict[str, int] = {}
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._restoring: Dict[str, asyncio.Future] = {}
+        self.draining = False
+
+    @property
+    def shard(self) -> ShardContext:
+        # Lido a cada uso: o launcher configura o shard depois do import
+        return get_shard()
+
+    async def start(self):
+        """Assina os eventos de lobby dos outros shards"""
+        bus = self.shard.bus
+        bus.subscribe("lobby", self._on_lobby_event)
+        await bus.start()
+
+        if settings.HAND_ARCHIVE_ENABLED and self.hand_archive is None:
+            self.hand_archive = HandArchive(
+                shard_directory(settings.HAND_ARCHIVE_DIR, self.shard.index),
+                settings.HAND_ARCHIVE_SEGMENT_BYTES
+            )
+
+        if self.hand_history is not None:
+            self.hand_history.start()
+
+        if self.snapshot_store is not None and settings.SNAPSHOT_INTERVAL > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+
+        if self.hand_history is not None:
+            await self.hand_history.stop()
+        if self.hand_archive is not None:
+            self.hand_archive.close()
+            self.hand_archive = None
+
+        await self.shard.bus.close()
+        if self.engine_pool is not None:
+            self.engine_pool.shutdown()
+
+    def _archive_hands(self, records: List[Dict[str, Any]]):
+        if self.hand_archive is not None:
+            self.hand_archive.append_many(records)
+
+    def _on_lobby_event(self, message: Dict[str, Any]):
+        if message["event"] == "room_created":
+            self.lobby[message["room_id"]] = message["shard"]
+        elif message["event"] == "room_removed":
+            self.lobby.pop(message["room_id"], None)
     
-    def create_room(self, room_id: str) -> dict:
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(settings.SNAPSHOT_INTERVAL)
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                logger.error(f"Error writing room snapshots: {e}")
+
+    async def checkpoint(self, room_ids: Optional[List[str]] = None, force: bool = False) -> int:
+        """
+        Grava o snapshot das salas alteradas desde o último (todas com force).
+        O snapshot é montado entre comandos do actor e gravado numa thread.
+        """
+        if self.snapshot_store is None:
+            return 0
+
+        loop = asyncio.get_running_loop()
+        written = 0
+        for room_id in room_ids if room_ids is not None else list(self.rooms):
+            room = self.rooms.get(room_id)
+            if room is None:
+                continue
+
+            actor = room["actor"]
+            if not force and actor.revision == self._snapshot_revisions.get(room_id):
+                continue
+
+            snapshot = await actor.call(lambda: build_snapshot(room_id, room, actor.revision))
+            if snapshot is None:
+                continue
+
+            await loop.run_in_executor(None, self.snapshot_store.save, room_id, snapshot)
+            self._snapshot_revisions[room_id] = snapshot["revision"]
+            written += 1
+
+            # Sala encerrada enquanto o snapshot era gravado
+            if room_id not in self.rooms:
+                await loop.run_in_executor(None, self.snapshot_store.delete, room_id)
+
+        return written
+
+    async def drain(self) -> int:
+        """
+        Prepara o processo para encerrar: nenhuma mão nova começa, quem
+        desconecta mantém o assento e todas as salas são gravadas.
+        """
+        self.draining = True
+        for room in self.rooms.values():
+            room["actor"].draining = True
+
+        written = await self.checkpoint(force=True)
+        logger.info(f"Drain: {written} room snapshots written")
+        return written
+
+    async def get_or_restore_room(self, room_id: str) -> dict:
+        """Sala em memória, restaurada do snapshot ou criada do zero"""
+        room = self.rooms.get(room_id)
+        if room is not None:
+            return room
+
+        # Conexões simultâneas na mesma sala aguardam a mesma restauração
+        pending = self._restoring.get(room_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._restoring[room_id] = future
+        try:
+            snapshot = None
+            if self.snapshot_store is not None:
+                snapshot = await asyncio.get_running_loop().run_in_executor(
+                    None, self.snapshot_store.load, room_id
+                )
+
+            room = self.rooms.get(room_id) or self.create_room(room_id, snapshot)
+            future.set_result(room)
+            return room
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._restoring.pop(room_id, None)
+
+    @staticmethod
+    def _new_table() -> PokerTable:
+        return PokerTable(
+            card_encoding=settings.POKER_CARD_ENCODING,
+            fast_evaluator=settings.POKER_FAST_EVALUATOR,
+            seeded_decks=settings.POKER_SEEDED_DECKS
+        )
+
+    def create_room(self, room_id: str, snapshot: Optional[Dict[str, Any]] = None) -> dict:
         self.rooms[room_id] = {
             "connection_manager": ConnectionManager(),
+            "table": self._new_table(),
             "game_session": None,
             "players": {},
-            "player_stacks": []
+            "reserved": {}  # user_id -> jogador de snapshot ainda não reconectado
         }
-        return self.rooms[room_id]
+        room = self.rooms[room_id]
+
+        if snapshot is not None:
+            try:
+                restore_room(room, snapshot)
+                logger.info(f"Room {room_id} restored from snapshot revision {snapshot['revision']}")
+            except Exception as e:
+                logger.error(f"Error restoring room {room_id}, starting empty: {e}")
+                room["table"] = self._new_table()
+                room["game_session"] = None
+                room["reserved"] = {}
+
+        # Uma única tarefa por sala aplica os comandos em ordem
+        room["actor"] = RoomActor(
+            room_id,
+            room,
+            on_empty=self.remove_room,
+            engine_pool=self.engine_pool,
+            hand_history=self.hand_history
+        )
+        room["actor"].draining = self.draining
+        room["connection_manager"].resync = room["actor"].resync_state
+        room["actor"].start()
+
+        self.shard.bus.publish("lobby", {
+            "event": "room_created",
+            "room_id": room_id,
+            "shard": self.shard.index
+        })
+        return room
     
+    async def run_engine(self, fn, *args) -> Any:
+        """Cálculo avulso (fora de uma sala) no engine pool ou no executor padrão"""
+        if self.engine_pool is not None:
+            return await self.engine_pool.run_any(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
     def get_room(self, room_id: str) -> Optional[dict]:
         return self.rooms.get(room_id)
     
     def remove_room(self, room_id: str):
-        if room_id in self.rooms:
-            del self.rooms[room_id]
+        room = self.rooms.pop(room_id, None)
+        if room is not None:
+            room["actor"].stop()
+
+            self._snapshot_revisions.pop(room_id, None)
+            if self.snapshot_store is not None:
+                asyncio.get_running_loop().run_in_executor(None, self.snapshot_store.delete, room_id)
+
+            self.shard.bus.publish("lobby", {
+                "event": "room_removed",
+                "room_id": room_id,
+                "shard": self.shard.index
+            })
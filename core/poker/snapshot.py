@@ -0,0 +1,78 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 2: mão sempre restaurada de seed + ações (sem State serializado)
+SNAPSHOT_FORMAT = 2
+
+
+class SnapshotStore:
+    """
+    Snapshots de salas em disco, um arquivo JSON por sala. A escrita é
+    atômica (arquivo temporário + rename) e feita fora do event loop.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, room_id: str) -> str:
+        return os.path.join(self.directory, quote(room_id, safe="") + ".json")
+
+    def save(self, room_id: str, snapshot: Dict[str, Any]):
+        path = self._path(room_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load(self, room_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(room_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, room_id: str):
+        try:
+            os.remove(self._path(room_id))
+        except FileNotFoundError:
+            pass
+
+
+def build_snapshot(room_id: str, room: dict, revision: int) -> Dict[str, Any]:
+    """
+    Snapshot da sala: mesa, mão em andamento e jogadores (conectados ou
+    com assento reservado). Deve rodar entre dois comandos do RoomActor.
+    """
+    players = [dict(info) for info in room["players"].values()]
+    players += [dict(info) for info in room["reserved"].values()]
+
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "room_id": room_id,
+        "revision": revision,
+        "saved_at": datetime.utcnow().isoformat(),
+        "table": room["table"].to_snapshot(),
+        "players": players,
+    }
+
+
+def restore_room(room: dict, snapshot: Dict[str, Any]):
+    """
+    Restaura mesa e mão na sala recém-criada. Nenhum jogador está conectado:
+    os assentos ficam reservados até o usuário voltar e enviar join.
+    """
+    if snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Formato de snapshot desconhecido: {snapshot.get('format')}")
+
+    room["table"].restore(snapshot["table"])
+    room["game_session"] = room["table"].session
+    room["reserved"] = {info["user_id"]: info for info in snapshot["players"]}
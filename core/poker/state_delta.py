@@ -0,0 +1,62 @@
+from typing import Any, Dict, List
+
+
+_TRACKED_KEYS = (
+    "phase",
+    "pot",
+    "pots",
+    "current_player",
+    "min_raise",
+    "active",
+    "last_action",
+)
+
+_PLAYER_KEYS = ("stack", "bet", "folded")
+
+
+def diff_game_state(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calcula as mudanças entre dois estados públicos de get_game_state.
+    O cliente aplica o delta se a sua versão for igual a "base";
+    caso contrário deve pedir um snapshot completo (get_state).
+    """
+    delta: Dict[str, Any] = {
+        "version": current["version"],
+        "base": previous["version"],
+    }
+
+    for key in _TRACKED_KEYS:
+        if current.get(key) != previous.get(key):
+            delta[key] = current.get(key)
+
+    previous_board = previous.get("board_cards", [])
+    current_board = current.get("board_cards", [])
+    if current_board != previous_board:
+        if current_board[:len(previous_board)] == previous_board:
+            delta["board_added"] = current_board[len(previous_board):]
+        else:
+            delta["board_cards"] = current_board
+
+    players = _diff_players(previous.get("players", []), current.get("players", []))
+    if players:
+        delta["players"] = players
+
+    return delta
+
+
+def _diff_players(previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    previous_by_id = {player["id"]: player for player in previous}
+    changed = []
+
+    for player in current:
+        before = previous_by_id.get(player["id"])
+        if before is None:
+            changed.append(player)
+            continue
+
+        fields = {key: player[key] for key in _PLAYER_KEYS if player.get(key) != before.get(key)}
+        if fields:
+            fields["id"] = player["id"]
+            changed.append(fields)
+
+    return changed
@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+
+from core.poker.poker_enums import CardEncoding
+from core.poker.poker_session import PokerGameSession
+from core.poker.deck import new_seed
+
+logger = logging.getLogger(__name__)
+
+
+class PokerTable:
+    """
+    Mesa persistente: encadeia mãos consecutivas, gira o botão e
+    carrega os stacks de uma mão para a próxima.
+    """
+
+    def __init__(
+        self,
+        small_blind: int = 50,
+        big_blind: int = 100,
+        antes: int = 0,
+        card_encoding: CardEncoding = CardEncoding.TEXT,
+        fast_evaluator: bool = False,
+        seeded_decks: bool = False,
+    ):
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.antes = antes
+        self.card_encoding = card_encoding
+        self.fast_evaluator = fast_evaluator
+        self.seeded_decks = seeded_decks
+
+        self.stacks: Dict[int, int] = {}  # assento -> fichas
+        self.button: Optional[int] = None
+        self.hand_number = 0
+        self.session: Optional[PokerGameSession] = None
+        self._settled = False
+
+    def sit(self, seat: int, chips: int):
+        """Senta um jogador (ou recompra) no assento informado"""
+        self.stacks[seat] = chips
+
+    def leave(self, seat: int):
+        """Remove o assento das próximas mãos"""
+        self.stacks.pop(seat, None)
+
+    def seats_in_use(self) -> Set[int]:
+        """
+        Assentos que um novo jogador não pode ocupar: com fichas na mesa ou
+        na mão ainda não liquidada (mesmo que o jogador já tenha saído)
+        """
+        seats = set(self.stacks)
+        if self.session is not None and not self._settled:
+            seats.update(self.session.seats)
+        return seats
+
+    def hand_in_progress(self) -> bool:
+        return self.session is not None and not self.session.is_hand_complete()
+
+    def can_start_hand(self) -> Tuple[bool, str]:
+        if self.hand_in_progress():
+            return False, "Mão em andamento"
+
+        self._settle()
+        if len(self._active_seats()) < 2:
+            return False, "Mínimo de 2 jogadores com fichas necessário"
+
+        return True, "OK"
+
+    def start_hand(self) -> PokerGameSession:
+        """Inicia a próxima mão com o botão girado e os stacks atualizados"""
+        can_start, message = self.can_start_hand()
+        if not can_start:
+            raise ValueError(message)
+
+        active = self._active_seats()
+        self.button = self._next_button(active)
+
+        # Ordem da mão: primeiro assento após o botão (small blind) até o botão
+        button_index = active.index(self.button)
+        order = active[button_index + 1:] + active[:button_index + 1]
+
+        version = self.session.version + 1 if self.session else 0
+
+        self.session = PokerGameSession(
+            player_count=len(order),
+            starting_stacks=tuple(self.stacks[seat] for seat in order),
+            small_blind=self.small_blind,
+            big_blind=self.big_blind,
+            card_encoding=self.card_encoding,
+            antes=self.antes,
+            seats=tuple(order),
+            version=version,
+            fast_evaluator=self.fast_evaluator,
+            seed=new_seed() if self.seeded_decks else None,
+        )
+        self._settled = False
+        self.hand_number += 1
+        logger.info(f"Hand {self.hand_number} started, button at seat {self.button}")
+
+        return self.session
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            "small_blind": self.small_blind,
+            "big_blind": self.big_blind,
+            "antes": self.antes,
+            "stacks": sorted(self.stacks.items()),
+            "button": self.button,
+            "hand_number": self.hand_number,
+            "settled": self._settled,
+            "hand": self.session.to_snapshot() if self.session else None,
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Restaura a mesa (e a mão em andamento) de um snapshot de to_snapshot()"""
+        self.small_blind = snapshot["small_blind"]
+        self.big_blind = snapshot["big_blind"]
+        self.antes = snapshot["antes"]
+        self.stacks = {seat: chips for seat, chips in snapshot["stacks"]}
+        self.button = snapshot["button"]
+        self.hand_number = snapshot["hand_number"]
+        self._settled = snapshot["settled"]
+
+        self.session = None
+        if snapshot["hand"]:
+            self.session = PokerGameSession.from_snapshot(
+                snapshot["hand"],
+                self.small_blind,
+                self.big_blind,
+                self.card_encoding,
+                self.antes,
+                self.fast_evaluator,
+            )
+
+    def _settle(self):
+        # Carrega para a mesa os stacks finais da última mão
+        if self._settled or self.session is None or not self.session.is_hand_complete():
+            return
+
+        for seat, stack in zip(self.session.seats, self.session.state.stacks):
+            if seat in self.stacks:
+                self.stacks[seat] = stack
+        self._settled = True
+
+    def _active_seats(self) -> List[int]:
+        return sorted(seat for seat, stack in self.stacks.items() if stack > 0)
+
+    def _next_button(self, active: List[int]) -> int:
+        if self.button is None:
+            # Primeira mão: o último assento é o botão, o assento 0 o small blind
+            return active[-1]
+
+        for seat in active:
+            if seat > self.button:
+                return seat
+        return active[0]
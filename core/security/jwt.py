@@ -6,6 +6,11 @@ from fastapi import HTTPException
 
 from core.config import settings
 from core.enums import TokenType
+from core.security.token_cache import TokenCache
+
+
+# Payloads já verificados: reconexões em massa não refazem a assinatura
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
 
 
 def create_token(user_id: int, token_type: TokenType):
@@ -33,12 +38,22 @@ def create_token(user_id: int, token_type: TokenType):
     
 
 def decode_token(token: str):
+    payload, expired = token_cache.get(token)
+    if expired:
+        raise HTTPException(
+            status_code=401,
+            detail="Faça login novamente"
+        )
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
+        token_cache.put(token, payload)
         return payload
 
     except ExpiredSignatureError:
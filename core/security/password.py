@@ -1,14 +1,208 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
+from core.config import settings
+
+
+def build_context(sha256_rounds: int, bcrypt_rounds: int) -> CryptContext:
+    """
+    sha256_crypt gera os hashes novos; bcrypt só verifica hashes antigos.
+    Com min_rounds igual ao custo atual, hash com custo menor (ou de esquema
+    obsoleto) é marcado pelo deprecated="auto" e refeito no próximo login.
+    """
+    return CryptContext(
+        schemes=["sha256_crypt", "bcrypt"],
+        deprecated="auto",
+        sha256_crypt__default_rounds=sha256_rounds,
+        sha256_crypt__min_rounds=sha256_rounds,
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+    )
+
 
-pwd_context = CryptContext(schemes=["sha256_crypt", "bcrypt"], deprecated="auto")
+pwd_context = build_context(settings.PASSWORD_SHA256_ROUNDS, settings.PASSWORD_BCRYPT_ROUNDS)
 
 
 def hash_pwd(password: str):
     context = pwd_context.hash(password)
     return context
-    
+
 
 def verify_pwd(plain_password: str, hashed_password: str):
     result = pwd_context.verify(plain_password, hashed_password)
-    return result
\ No newline at end of file
+    return result
+
+
+def verify_and_update_pwd(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica a senha; se o hash estiver desatualizado, retorna também o novo"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# Funções executadas no pool: retornam o resultado e o tempo de CPU gasto
+
+def _init_worker(sha256_rounds: int, bcrypt_rounds: int):
+    global pwd_context
+    pwd_context = build_context(sha256_rounds, bcrypt_rounds)
+
+
+def _timed_hash(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    result = hash_pwd(password)
+    return result, time.perf_counter() - started
+
+
+def _timed_verify(plain_password: str, hashed_password: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    result = verify_and_update_pwd(plain_password, hashed_password)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """
+    Hash e verificação de senha fora do event loop. O os_crypt segura o
+    GIL durante o hash, por isso o padrão é um pool de processos. No máximo
+    `workers` hashes rodam ao mesmo tempo e `queue_size` aguardam; além
+    disso a requisição é recusada na hora com 503 em vez de acumular.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        sha256_rounds: int,
+        bcrypt_rounds: int,
+        use_processes: bool = True
+    ):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.sha256_rounds = sha256_rounds
+        self.bcrypt_rounds = bcrypt_rounds
+        self.use_processes = use_processes
+        self.executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "failed": 0,
+            "restarts": 0,
+            "rehashed": 0,
+            "max_queue_depth": 0,
+            "total_queue_time": 0.0,
+            "max_queue_time": 0.0,
+            "total_run_time": 0.0,
+            "max_run_time": 0.0,
+        }
+
+    def start(self):
+        if self.executor is not None:
+            return
+
+        if self.use_processes:
+            # spawn: o processo do servidor já tem threads e event loop
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.sha256_rounds, self.bcrypt_rounds)
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _restart(self, broken: Executor):
+        """
+        Troca o pool quebrado (um worker morreu) por um novo. Várias
+        requisições recebem o mesmo erro; só a primeira recria o pool.
+        """
+        if self.executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            self.stats["restarts"] += 1
+        self.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.workers + self.queue_size:
+            self.stats["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado, tente novamente",
+                headers={"Retry-After": "1"}
+            )
+
+        self.start()
+        self.in_flight += 1
+        self.stats["submitted"] += 1
+        if self.queue_depth > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = self.queue_depth
+
+        submitted_at = time.perf_counter()
+        try:
+            executor = self.executor
+            try:
+                result, run_time = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # Uma nova tentativa com pool novo; se quebrar de novo, falha
+                self._restart(executor)
+                result, run_time = await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        queue_time = max(0.0, time.perf_counter() - submitted_at - run_time)
+        stats = self.stats
+        stats["completed"] += 1
+        stats["total_queue_time"] += queue_time
+        stats["total_run_time"] += run_time
+        if queue_time > stats["max_queue_time"]:
+            stats["max_queue_time"] = queue_time
+        if run_time > stats["max_run_time"]:
+            stats["max_run_time"] = run_time
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_timed_hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(senha correta, novo hash quando o atual precisa ser refeito)"""
+        valid, new_hash = await self._run(_timed_verify, plain_password, hashed_password)
+        if new_hash is not None:
+            self.stats["rehashed"] += 1
+        return valid, new_hash
+
+    def get_stats(self) -> Dict[str, Any]:
+        completed = self.stats["completed"]
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "avg_queue_time": self.stats["total_queue_time"] / completed if completed else 0.0,
+            "avg_run_time": self.stats["total_run_time"] / completed if completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_QUEUE_SIZE,
+    settings.PASSWORD_SHA256_ROUNDS,
+    settings.PASSWORD_BCRYPT_ROUNDS,
+    use_processes=settings.PASSWORD_HASH_PROCESSES
+)
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from core.config import settings
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket por chave: `rate` fichas por segundo até `burst`. As chaves
+    ficam em ordem de último uso; as do início que já recarregaram por
+    completo equivalem a um bucket novo e são descartadas, e acima de
+    max_keys sai a menos usada. Custo O(1) amortizado por requisição.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.refill_time = burst / rate if rate > 0 else float("inf")
+        self.buckets: "OrderedDict[str, List[float]]" = OrderedDict()  # chave -> [fichas, último uso]
+        self.stats = {
+            "allowed": 0,
+            "rejected": 0,
+            "evictions": 0,
+        }
+
+    def acquire(self, key: str) -> float:
+        """Consome uma ficha; retorna 0 ou os segundos até haver uma"""
+        now = time.monotonic()
+        self._evict(now, key)
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(self.burst), now]
+        else:
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            self.stats["allowed"] += 1
+            return 0.0
+
+        self.stats["rejected"] += 1
+        return (1.0 - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+
+    def _evict(self, now: float, incoming: str):
+        # Buckets já cheios de novo saem sempre; o LRU só abre espaço para uma chave nova
+        buckets = self.buckets
+        while buckets:
+            key, (_, last) = next(iter(buckets.items()))
+            if now - last < self.refill_time and (incoming in buckets or len(buckets) < self.max_keys):
+                return
+            del buckets[key]
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "keys": len(self.buckets),
+            "max_keys": self.max_keys,
+            "rate": self.rate,
+            "burst": self.burst,
+        }
+
+
+class AuthRateLimiter:
+    """
+    Limite das rotas de login e registro, aplicado antes de qualquer
+    consulta ao banco ou hash de senha: um bucket por IP e um por e-mail.
+    """
+
+    def __init__(self, enabled: bool, ip_per_minute: float, ip_burst: int,
+                 email_per_minute: float, email_burst: int, max_keys: int):
+        self.enabled = enabled
+        self.by_ip = TokenBucketLimiter(ip_per_minute / 60.0, ip_burst, max_keys)
+        self.by_email = TokenBucketLimiter(email_per_minute / 60.0, email_burst, max_keys)
+
+    def check(self, ip: Optional[str], email: str):
+        if not self.enabled:
+            return
+
+        retry_after = self.by_ip.acquire(ip or "unknown")
+        if not retry_after:
+            retry_after = self.by_email.acquire(email.strip().lower())
+
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Muitas tentativas, tente novamente mais tarde",
+                headers={"Retry-After": str(max(1, int(min(retry_after, 3600) + 0.999)))}
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ip": self.by_ip.get_stats(),
+            "email": self.by_email.get_stats(),
+        }
+
+
+auth_rate_limiter = AuthRateLimiter(
+    settings.AUTH_RATE_LIMIT_ENABLED,
+    settings.AUTH_RATE_LIMIT_IP_PER_MINUTE,
+    settings.AUTH_RATE_LIMIT_IP_BURST,
+    settings.AUTH_RATE_LIMIT_EMAIL_PER_MINUTE,
+    settings.AUTH_RATE_LIMIT_EMAIL_BURST,
+    settings.AUTH_RATE_LIMIT_MAX_KEYS
+)
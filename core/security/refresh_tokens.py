@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.enums import TokenType
+from core.security.jwt import create_token
+from db.database import AsyncSessionLocal
+from db.models import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevokedTokenIndex:
+    """
+    JTIs de refresh tokens revogados (logout, rotação, limite por usuário)
+    até o exp de cada um. Replay de um token conhecido é recusado sem ir ao
+    banco; o banco continua sendo a fonte da verdade para o resto.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, float]" = OrderedDict()
+        self.stats = {
+            "revoked": 0,
+            "rejected": 0,
+            "evictions": 0,
+        }
+
+    def revoke(self, jti: str, exp: Any):
+        if self.max_size <= 0:
+            return
+
+        if isinstance(exp, datetime):
+            exp = (exp - datetime(1970, 1, 1)).total_seconds()
+        self.entries[jti] = float(exp)
+        self.entries.move_to_end(jti)
+        self.stats["revoked"] += 1
+
+        # Cheio: sai o revogado há mais tempo; o banco ainda o recusa
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        exp = self.entries.get(jti)
+        if exp is None:
+            return False
+        if exp < time.time():
+            # Expirado: o decode_token já recusa, não precisa mais do índice
+            del self.entries[jti]
+            return False
+        self.stats["rejected"] += 1
+        return True
+
+    def prune(self) -> int:
+        now = time.time()
+        expired = [jti for jti, exp in self.entries.items() if exp < now]
+        for jti in expired:
+            del self.entries[jti]
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "size": len(self.entries), "max_size": self.max_size}
+
+
+revoked_tokens = RevokedTokenIndex(settings.REVOKED_TOKEN_INDEX_SIZE)
+
+
+async def issue_refresh_token(session: AsyncSession, user_id: int) -> Tuple[str, str, datetime]:
+    """
+    Cria o refresh token do usuário na transação da sessão (o chamador faz
+    o commit). Acima do limite por usuário, os mais antigos são revogados.
+    """
+    refresh_token, refresh_jti, refresh_exp = create_token(user_id, TokenType.REFRESH)
+    session.add(RefreshToken(
+        user_id=user_id,
+        jti=refresh_jti,
+        expire_at=refresh_exp
+    ))
+
+    cap = settings.REFRESH_TOKEN_MAX_PER_USER
+    if cap > 0:
+        # Envia o token novo e remoções pendentes (rotação) antes de contar
+        await session.flush()
+        result = await session.execute(
+            select(RefreshToken.id, RefreshToken.jti, RefreshToken.expire_at)
+            .where(
+                RefreshToken.user_id == user_id,
+                RefreshToken.expire_at > datetime.utcnow()
+            )
+            .order_by(RefreshToken.expire_at.desc())
+            .offset(cap)
+        )
+        surplus = result.all()
+        if surplus:
+            await session.execute(delete(RefreshToken).where(RefreshToken.id.in_([row.id for row in surplus])))
+            for row in surplus:
+                revoked_tokens.revoke(row.jti, row.expire_at)
+
+    return refresh_token, refresh_jti, refresh_exp
+
+
+async def purge_expired_tokens(
+    batch_size: int,
+    session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+) -> int:
+    """
+    Apaga refresh tokens expirados em lotes de até batch_size linhas, uma
+    transação curta por lote, para não segurar o lock de escrita.
+    """
+    deleted = 0
+    while True:
+        async with session_factory() as session:
+            # Ids primeiro: o MySQL não aceita LIMIT em subquery de IN
+            expired_ids = (await session.scalars(
+                select(RefreshToken.id).where(
+                    RefreshToken.expire_at <= datetime.utcnow()
+                ).limit(batch_size)
+            )).all()
+            if expired_ids:
+                await session.execute(
+                    delete(RefreshToken).where(RefreshToken.id.in_(expired_ids))
+                )
+                await session.commit()
+
+        deleted += len(expired_ids)
+        if len(expired_ids) < batch_size:
+            return deleted
+
+        # Cede o event loop entre lotes
+        await asyncio.sleep(0)
+
+
+class RefreshTokenCompactor:
+    """Tarefa de fundo que compacta a tabela de refresh tokens periodicamente"""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {
+            "runs": 0,
+            "deleted": 0,
+            "last_run_time": 0.0,
+        }
+
+    def start(self):
+        if self.task is None and self.interval > 0:
+            self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error compacting refresh tokens: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        started = time.perf_counter()
+        deleted = await purge_expired_tokens(self.batch_size)
+        revoked_tokens.prune()
+
+        self.stats["runs"] += 1
+        self.stats["deleted"] += deleted
+        self.stats["last_run_time"] = time.perf_counter() - started
+        if deleted:
+            logger.info(f"Refresh token compaction: {deleted} expired rows deleted")
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+
+refresh_token_compactor = RefreshTokenCompactor(
+    settings.REFRESH_TOKEN_COMPACTION_INTERVAL,
+    settings.REFRESH_TOKEN_COMPACTION_BATCH
+)
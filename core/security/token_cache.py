@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """
+    Cache LRU de payloads de tokens já verificados, indexado pelo hash do
+    token. Só entram tokens com assinatura válida; a entrada vale até o exp
+    do próprio token. Os deps síncronos rodam no threadpool, daí o lock.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: "OrderedDict[bytes, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, token: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Retorna (payload, expirado). Token expirado sai do cache e é
+        reportado para o chamador responder como o jwt.decode responderia.
+        """
+        key = token_digest(token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None, False
+
+            payload, exp = entry
+            # Mesma regra do python-jose: expirado quando exp < agora (em segundos)
+            if exp < int(time.time()):
+                del self.entries[key]
+                self.stats["expired"] += 1
+                return None, True
+
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(payload), False
+
+    def put(self, token: str, payload: Dict[str, Any]):
+        exp = payload.get("exp")
+        if not isinstance(exp, int) or self.max_size <= 0:
+            return
+
+        key = token_digest(token)
+        with self.lock:
+            self.entries[key] = (dict(payload), exp)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, token: Optional[str]):
+        """Remove o token do cache (logout, rotação do refresh)"""
+        if not token:
+            return
+
+        with self.lock:
+            if self.entries.pop(token_digest(token), None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
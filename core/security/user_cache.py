@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.database import SessionLocal
+from db.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Identidade do usuário autenticado, sem vínculo com Session do banco"""
+    id: int
+    username: str
+    is_active: bool
+
+
+class UserCache:
+    """
+    Cache LRU com TTL das identidades usadas pelos deps de autenticação.
+    Mudanças feitas pela API (desativação) invalidam na hora; o TTL limita
+    o atraso de alterações feitas direto no banco.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self.entries: "OrderedDict[int, Tuple[Principal, float]]" = OrderedDict()
+        self.lock = threading.Lock()
+        # Incrementado a cada invalidação: leitura do banco iniciada antes
+        # dela pode estar desatualizada e não entra no cache
+        self.version = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        """
+        Usuário ativo com esse id ou None. Na falta do cache, consulta o
+        banco numa sessão curta; só guarda o resultado de usuário ativo.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["misses"] += 1
+            version = self.version
+
+        principal = self._load(user_id)
+        if principal is not None:
+            self.put(principal, version)
+        return principal
+
+    def _load(self, user_id: int) -> Optional[Principal]:
+        session = self.session_factory()
+        try:
+            row = session.query(User.id, User.username, User.is_active).filter(
+                User.id == user_id,
+                User.is_active == True
+            ).first()
+        finally:
+            session.close()
+
+        if row is None:
+            return None
+        return Principal(id=row.id, username=row.username, is_active=bool(row.is_active))
+
+    def put(self, principal: Principal, version: Optional[int] = None):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+
+        with self.lock:
+            if version is not None and version != self.version:
+                return
+            self.entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self.entries.move_to_end(principal.id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, user_id: int):
+        """Descarta a identidade (usuário desativado ou alterado)"""
+        with self.lock:
+            self.version += 1
+            if self.entries.pop(user_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+
+async def set_user_active(session: AsyncSession, user_id: int, active: bool) -> bool:
+    """Ativa/desativa o usuário e invalida a identidade em cache"""
+    result = await session.execute(update(User).where(User.id == user_id).values(is_active=active))
+    await session.commit()
+    user_cache.invalidate(user_id)
+    return bool(result.rowcount)
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class MessageBus(ABC):
+    """Barramento de eventos entre shards (eventos de lobby, etc.)"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, topic: str, handler: Handler):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    @abstractmethod
+    def publish(self, topic: str, message: Dict[str, Any]):
+        """Entrega a mensagem aos assinantes do tópico em todos os shards"""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def _dispatch(self, topic: str, message: Dict[str, Any]):
+        for handler in self._handlers.get(topic, []):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Error handling bus message on {topic}: {e}")
+
+
+class InMemoryBus(MessageBus):
+    """Implementação local, para um único processo e para testes"""
+
+    def publish(self, topic: str, message: Dict[str, Any]):
+        self._dispatch(topic, message)
+
+
+class MultiprocessingBus(MessageBus):
+    """
+    Uma fila multiprocessing por shard. Deve ser criado no processo pai
+    e passado aos workers, que chamam bind() com o próprio índice.
+    """
+
+    def __init__(self, shard_count: int):
+        super().__init__()
+        context = get_context()
+        self.queues = [context.Queue() for _ in range(shard_count)]
+        self.index: Optional[int] = None
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __getstate__(self):
+        # Apenas as filas atravessam processos; handlers são locais
+        return {"queues": self.queues}
+
+    def __setstate__(self, state):
+        MessageBus.__init__(self)
+        self.queues = state["queues"]
+        self.index = None
+        self._reader = None
+        self._loop = None
+
+    def bind(self, index: int):
+        self.index = index
+
+    def publish(self, topic: str, message: Dict[str, Any]):
+        for index, queue in enumerate(self.queues):
+            if index != self.index:
+                queue.put((topic, message))
+
+        self._dispatch(topic, message)
+
+    async def start(self):
+        if self.index is None or self._reader is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._reader = threading.Thread(
+            target=self._read,
+            name=f"shard-bus-{self.index}",
+            daemon=True
+        )
+        self._reader.start()
+
+    async def close(self):
+        if self._reader is not None:
+            reader, self._reader = self._reader, None
+            self.queues[self.index].put(None)
+            await asyncio.get_running_loop().run_in_executor(None, reader.join, 1.0)
+
+    def _read(self):
+        queue = self.queues[self.index]
+        while True:
+            try:
+                item = queue.get()
+            except (EOFError, OSError):
+                # Fila fechada durante o encerramento do processo
+                return
+
+            if item is None:
+                return
+
+            topic, message = item
+            self._loop.call_soon_threadsafe(self._dispatch, topic, message)
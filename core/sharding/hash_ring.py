@@ -0,0 +1,30 @@
+import bisect
+import hashlib
+from typing import Iterable, List, Tuple
+
+
+def _hash(key: str) -> int:
+    # Hash estável entre processos (hash() do Python é randomizado)
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Anel de hashing consistente que mapeia ids de sala para shards"""
+
+    def __init__(self, shards: Iterable[int], replicas: int = 160):
+        self.replicas = replicas
+        self._ring: List[Tuple[int, int]] = []
+
+        for shard in shards:
+            for replica in range(replicas):
+                self._ring.append((_hash(f"{shard}:{replica}"), shard))
+
+        self._ring.sort()
+        self._keys = [key for key, _ in self._ring]
+
+    def get_shard(self, room_id: str) -> int:
+        if not self._ring:
+            raise ValueError("Anel sem shards")
+
+        position = bisect.bisect(self._keys, _hash(room_id)) % len(self._keys)
+        return self._ring[position][1]
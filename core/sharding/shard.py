@@ -0,0 +1,43 @@
+from typing import Optional
+
+from core.config import settings
+from core.sharding.bus import InMemoryBus, MessageBus
+from core.sharding.hash_ring import HashRing
+
+
+class ShardContext:
+    """Identidade do processo atual dentro do deploy shardeado"""
+
+    def __init__(self, index: int, count: int, bus: MessageBus):
+        self.index = index
+        self.count = count
+        self.bus = bus
+        self.ring = HashRing(range(count))
+
+    def owner(self, room_id: str) -> int:
+        return self.ring.get_shard(room_id)
+
+    def owns(self, room_id: str) -> bool:
+        return self.count == 1 or self.owner(room_id) == self.index
+
+    def port_for(self, index: int) -> int:
+        return settings.SHARD_BASE_PORT + index
+
+    def url_for(self, index: int) -> str:
+        return settings.SHARD_URL_TEMPLATE.format(port=self.port_for(index))
+
+
+_current: Optional[ShardContext] = None
+
+
+def configure_shard(index: int, count: int, bus: Optional[MessageBus] = None) -> ShardContext:
+    """Define o shard deste processo (chamado pelo launcher antes do uvicorn)"""
+    global _current
+    _current = ShardContext(index, count, bus or InMemoryBus())
+    return _current
+
+
+def get_shard() -> ShardContext:
+    if _current is None:
+        return configure_shard(settings.SHARD_INDEX, settings.SHARD_COUNT)
+    return _current
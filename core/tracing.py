@@ -0,0 +1,193 @@
+"""
+Tracing opcional do caminho WebSocket -> actor -> pokerkit -> envio.
+
+Desligado, cada ponto instrumentado custa só a leitura de `tracer.enabled`.
+Ligado, os spans vão para um ring buffer (os mais antigos são descartados)
+e podem ser exportados no formato Chrome trace (chrome://tracing, Perfetto).
+O profiler por amostragem roda numa thread própria e só existe enquanto o
+tracing está ligado com profile_hz > 0.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core.config import settings
+
+# Trilha (linha do Chrome trace) da tarefa atual: sala, conexão...
+current_lane: ContextVar[Optional[str]] = ContextVar("trace_lane", default=None)
+
+# (nome, categoria, início, fim, trilha, args)
+TraceEvent = Tuple[str, str, float, float, str, Optional[Dict[str, Any]]]
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "lane", "args", "started")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, lane: Optional[str], args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.lane = lane
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.cat, self.started, time.perf_counter(), self.lane, self.args)
+
+
+class StackSampler:
+    """
+    Amostra as pilhas de todas as threads do processo a `hz` por segundo e
+    conta pilhas idênticas. Saída no formato "folded" (flamegraph.pl,
+    speedscope). Acima de max_stacks pilhas distintas, o resto vira [other].
+    """
+
+    def __init__(self, hz: int, max_depth: int = 64, max_stacks: int = 20000):
+        self.interval = 1.0 / hz
+        self.hz = hz
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                stack = self._collapse(frame)
+                key = f"{names.get(thread_id, thread_id)};{stack}"
+                if key not in self.counts and len(self.counts) >= self.max_stacks:
+                    key = f"{names.get(thread_id, thread_id)};[other]"
+                self.counts[key] += 1
+            self.samples += 1
+
+    def _collapse(self, frame) -> str:
+        parts = []
+        while frame is not None and len(parts) < self.max_depth:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        parts.reverse()
+        return ";".join(parts)
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common()) + "\n"
+
+
+class Tracer:
+    def __init__(self, buffer_size: int):
+        self.enabled = False
+        self.events: Deque[TraceEvent] = deque(maxlen=buffer_size)
+        self.profiler: Optional[StackSampler] = None
+        self.started_at: Optional[float] = None
+        self.pid = os.getpid()
+
+    def start(self, profile_hz: int = 0):
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+        if profile_hz > 0:
+            self.profiler = StackSampler(profile_hz)
+            self.profiler.start()
+
+        self.started_at = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        # Buffer e pilhas amostradas ficam disponíveis para exportar
+        self.enabled = False
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def clear(self):
+        self.events.clear()
+        if self.profiler is not None and not self.enabled:
+            self.profiler = None
+
+    def span(self, name: str, cat: str, lane: Optional[str] = None, **args) -> _Span:
+        """Só deve ser chamado com `tracer.enabled` verdadeiro"""
+        return _Span(self, name, cat, lane, args or None)
+
+    def record(
+        self,
+        name: str,
+        cat: str,
+        start: float,
+        end: float,
+        lane: Optional[str] = None,
+        args: Optional[Dict[str, Any]] = None
+    ):
+        if lane is None:
+            lane = current_lane.get() or threading.current_thread().name
+        self.events.append((name, cat, start, end, lane, args))
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "events": len(self.events),
+            "buffer_size": self.events.maxlen,
+            "profiling": self.profiler is not None and self.enabled,
+            "profile_hz": self.profiler.hz if self.profiler is not None else 0,
+            "profile_samples": self.profiler.samples if self.profiler is not None else 0,
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Eventos do buffer no formato Chrome trace (tempos em µs)"""
+        events = list(self.events)
+        origin = min((event[2] for event in events), default=0.0)
+        lanes: Dict[str, int] = {}
+        trace: List[Dict[str, Any]] = []
+
+        for name, cat, start, end, lane, args in events:
+            tid = lanes.get(lane)
+            if tid is None:
+                tid = lanes[lane] = len(lanes) + 1
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": self.pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            trace.append(event)
+
+        trace += [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": lane}}
+            for lane, tid in lanes.items()
+        ]
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def folded_stacks(self) -> str:
+        if self.profiler is None:
+            return ""
+        return self.profiler.folded()
+
+
+tracer = Tracer(settings.TRACE_BUFFER_SIZE)
@@ -1,20 +1,17 @@
 from fastapi import WebSocket, WebSocketException, status
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import logging
-from typing import Optional
 
 from core.security.jwt import decode_token
+from core.security.user_cache import Principal, user_cache
 from core.enums import TokenType
-from db.models import User
 
 logger = logging.getLogger(__name__)
 
-async def get_current_user_ws(
-    websocket: WebSocket,
-    session: Session
-) -> Optional[User]:
+async def get_current_user_ws(websocket: WebSocket) -> Principal:
     """
-    Obtém o usuário atual a partir do token no cookie do WebSocket
+    Obtém o usuário atual a partir do token no cookie do WebSocket.
+    Retorna a identidade em cache: a conexão não mantém Session aberta.
     """
     # Tentar obter token do cookie ou query parameter
     access_token = websocket.cookies.get("access_token")
@@ -44,11 +41,8 @@ async def get_current_user_ws(
         
         user_id = int(payload.get("sub"))
         
-        # Buscar usuário no banco
-        user = session.query(User).filter(
-            User.id == user_id,
-            User.is_active == True
-        ).first()
+        # Buscar usuário no cache (no banco, fora do event loop, se faltar)
+        user = await run_in_threadpool(user_cache.get, user_id)
         
         if not user:
             logger.warning(f"User not found or inactive: {user_id}")
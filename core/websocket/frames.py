@@ -0,0 +1,36 @@
+import json
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fallback sem orjson instalado
+    orjson = None
+
+# Mesmo resultado do json da stdlib para chaves int e escalares numpy
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson is not None else 0
+
+
+def dumps(message: Any) -> str:
+    """Serializa a mensagem em JSON compacto (orjson quando disponível)"""
+    if orjson is not None:
+        return orjson.dumps(message, option=ORJSON_OPTIONS).decode("utf-8")
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class Frame:
+    """Mensagem já serializada, enviada sem recodificar para cada conexão"""
+
+    __slots__ = ("data", "kind")
+
+    def __init__(self, data: str, kind: Optional[str] = None):
+        self.data = data
+        # "type" da mensagem: decide o que pode ser coalescido na fila de saída
+        self.kind = kind
+
+    @classmethod
+    def encode(cls, message: Any) -> "Frame":
+        kind = message.get("type") if isinstance(message, dict) else None
+        return cls(dumps(message), kind=kind)
+
+    def __len__(self) -> int:
+        return len(self.data)
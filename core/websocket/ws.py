@@ -1,66 +1,207 @@
-from typing import Dict, Set
-from fastapi import WebSocket, WebSocketDisconnect
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Set, Union
+from fastapi import WebSocket, WebSocketDisconnect, status
 import logging
 
+from core.config import settings
+from core.enums import SlowConsumerPolicy
+from core.websocket.frames import Frame
+from core.metrics import (
+    FANOUT_SECONDS, FANOUT_RECIPIENTS, FANOUT_BYTES,
+    FRAME_BYTES, MESSAGES_SENT, BYTES_SENT, MESSAGES_DROPPED
+)
+from core.tracing import tracer
+
 logger = logging.getLogger(__name__)
 
+# Mensagens superadas pela próxima atualização; as demais (joined, error,
+# game_started, hand_complete...) nunca são descartadas
+SUPERSEDED_KINDS = frozenset({"state", "delta"})
+
+
+class _Outbox:
+    """Fila de saída limitada e tarefa de escrita de uma conexão"""
+
+    def __init__(self, websocket: WebSocket, maxsize: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        policy: Optional[SlowConsumerPolicy] = None
+    ):
+        self.active_connections: Dict[WebSocket, _Outbox] = {}
+        self.queue_size = queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.policy = policy or settings.WS_SLOW_CONSUMER_POLICY
+
+        # Estado completo atual de uma conexão, no lugar dos states/deltas
+        # coalescidos (definido pela sala)
+        self.resync: Optional[Callable[[WebSocket], Optional[dict]]] = None
+
+        # Fechamentos de clientes lentos em andamento (referência até terminar)
+        self._closing: Set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket):
-        """Adiciona uma nova conexão WebSocket"""
-        self.active_connections.add(websocket)
+        """Adiciona uma nova conexão WebSocket e inicia sua tarefa de escrita"""
+        outbox = _Outbox(websocket, self.queue_size)
+        outbox.task = asyncio.create_task(self._writer(outbox))
+        self.active_connections[websocket] = outbox
         logger.debug(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         """Remove uma conexão WebSocket"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.debug(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+        outbox = self.active_connections.pop(websocket, None)
+        if outbox is None:
+            return
+
+        if outbox.task and outbox.task is not asyncio.current_task():
+            outbox.task.cancel()
+        logger.debug(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+
+    async def send_to(self, websocket: WebSocket, message: Union[dict, Frame]):
+        """Enfileira mensagem para um WebSocket específico"""
+        outbox = self.active_connections.get(websocket)
+        if outbox is not None:
+            self._enqueue(outbox, self._frame(message))
+
+    async def broadcast(self, message: Union[dict, Frame]):
+        """Enfileira mensagem para todos os WebSockets conectados"""
+        started = time.perf_counter()
+        frame = self._frame(message)
+        outboxes = list(self.active_connections.values())
+        for outbox in outboxes:
+            self._enqueue(outbox, frame)
+        self._observe_fanout(started, frame, len(outboxes))
+
+    async def broadcast_except(self, exclude_websocket: WebSocket, message: Union[dict, Frame]):
+        """Enfileira mensagem para todos exceto um WebSocket específico"""
+        started = time.perf_counter()
+        frame = self._frame(message)
+        recipients = 0
+        for connection, outbox in list(self.active_connections.items()):
+            if connection == exclude_websocket:
+                continue
+
+            self._enqueue(outbox, frame)
+            recipients += 1
+        self._observe_fanout(started, frame, recipients)
+
+    @staticmethod
+    def _observe_fanout(started: float, frame: Frame, recipients: int):
+        # Inclui a serialização quando a mensagem chega como dict
+        FANOUT_SECONDS.observe(time.perf_counter() - started)
+        FANOUT_RECIPIENTS.inc(recipients)
+        FANOUT_BYTES.inc(len(frame) * recipients)
+
+    @staticmethod
+    def _frame(message: Union[dict, Frame]) -> Frame:
+        # Serializa uma única vez, independente do número de destinatários
+        if isinstance(message, Frame):
+            return message
+        return Frame.encode(message)
 
-    async def send_to(self, websocket: WebSocket, message: dict):
-        """Envia mensagem para um WebSocket específico"""
+    def _enqueue(self, outbox: _Outbox, frame: Frame):
         try:
-            await websocket.send_json(message)
+            outbox.queue.put_nowait(frame)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Cliente lento: a fila já está cheia. Só states/deltas podem ser
+        # descartados; um delta perdido vira state completo (sem buraco de
+        # versão) e as demais mensagens nunca somem em silêncio
+        if self.policy == SlowConsumerPolicy.DROP and frame.kind in SUPERSEDED_KINDS:
+            if frame.kind == "state":
+                outbox.dropped += 1
+                MESSAGES_DROPPED.inc()
+                return
+            if self._coalesce(outbox, frame):
+                return
+
+        elif self.policy == SlowConsumerPolicy.COALESCE and self._coalesce(outbox, frame):
+            return
+
+        logger.warning("Slow websocket consumer, disconnecting")
+        self.disconnect(outbox.websocket)
+        task = asyncio.create_task(self._close(outbox.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _coalesce(self, outbox: _Outbox, frame: Frame) -> bool:
+        """
+        Troca os states/deltas pendentes por um único state completo atual;
+        mensagens de controle e resultado seguem na ordem. Retorna False se
+        não há como abrir espaço sem perder uma delas ou a versão dos deltas.
+        """
+        pending: List[Frame] = []
+        while not outbox.queue.empty():
+            pending.append(outbox.queue.get_nowait())
+
+        superseded = [item for item in pending + [frame] if item.kind in SUPERSEDED_KINDS]
+        frames = [item for item in pending if item.kind not in SUPERSEDED_KINDS]
+
+        if superseded:
+            state = self.resync(outbox.websocket) if self.resync is not None else None
+            if state is not None:
+                frames.append(Frame.encode(state))
+            elif all(item.kind == "state" for item in superseded):
+                frames.append(superseded[-1])
+            else:
+                # Sem o estado completo, descartar um delta deixaria um buraco de versão
+                frames = None
+
+        if frames is not None and frame.kind not in SUPERSEDED_KINDS:
+            frames.append(frame)
+
+        if frames is None or len(frames) > self.queue_size:
+            # Fila intacta; o chamador desconecta o cliente
+            for item in pending:
+                outbox.queue.put_nowait(item)
+            return False
+
+        for item in frames:
+            outbox.queue.put_nowait(item)
+
+        dropped = len(superseded) - 1 if superseded else 0
+        if dropped:
+            outbox.dropped += dropped
+            MESSAGES_DROPPED.inc(dropped)
+        return True
+
+    async def _writer(self, outbox: _Outbox):
+        websocket = outbox.websocket
+        try:
+            while True:
+                frame = await outbox.queue.get()
+                tracing = tracer.enabled
+                if tracing:
+                    started = time.perf_counter()
+                await websocket.send_text(frame.data)
+                if tracing:
+                    # Tarefa criada no handler da conexão: herda a trilha dela
+                    tracer.record("send", "ws", started, time.perf_counter(), args={"bytes": len(frame)})
+                MESSAGES_SENT.inc()
+                BYTES_SENT.inc(len(frame))
+                FRAME_BYTES.observe(len(frame))
+        except asyncio.CancelledError:
+            raise
         except WebSocketDisconnect:
             self.disconnect(websocket)
         except Exception as e:
             logger.error(f"Error sending to websocket: {e}")
             self.disconnect(websocket)
 
-    async def broadcast(self, message: dict):
-        """Envia mensagem para todos os WebSockets conectados"""
-        disconnected = set()
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except WebSocketDisconnect:
-                disconnected.add(connection)
-            except Exception as e:
-                logger.error(f"Error broadcasting to websocket: {e}")
-                disconnected.add(connection)
-        
-        # Limpar conexões desconectadas
-        for conn in disconnected:
-            self.disconnect(conn)
-    
-    async def broadcast_except(self, exclude_websocket: WebSocket, message: dict):
-        """Envia mensagem para todos exceto um WebSocket específico"""
-        disconnected = set()
-        
-        for connection in self.active_connections:
-            if connection == exclude_websocket:
-                continue
-                
-            try:
-                await connection.send_json(message)
-            except WebSocketDisconnect:
-                disconnected.add(connection)
-            except Exception as e:
-                logger.error(f"Error broadcasting to websocket: {e}")
-                disconnected.add(connection)
-        
-        for conn in disconnected:
-            self.disconnect(conn)
\ No newline at end of file
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="Conexão lenta demais"
+            )
+        except Exception as e:
+            logger.debug(f"Error closing slow websocket: {e}")
@@ -1,9 +1,102 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from core.config import settings
+from core.metrics import DB_QUERY_SECONDS
+
+# Drivers async equivalentes aos da DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def get_async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_sqlite_memory(url: str) -> bool:
+    return is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL: leitores não bloqueiam o escritor; busy_timeout evita 'database is locked'"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT}")
+    cursor.close()
+
+
+def instrument_engine(engine, name: str):
+    """Tempo de cada consulta no histograma db_query_seconds{engine=name}"""
+    histogram = DB_QUERY_SECONDS.labels(name)
 
-db = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            histogram.observe(time.perf_counter() - started)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
+
+
+def pool_options(url: str) -> dict:
+    # SQLite em memória usa uma conexão única (StaticPool), sem opções de pool
+    if is_sqlite_memory(url):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Engine síncrona: gravação das mãos e leituras feitas em threads
+db = create_engine(
+    settings.DATABASE_URL,
+    connect_args={"check_same_thread": False} if is_sqlite(settings.DATABASE_URL) else {},
+    **pool_options(settings.DATABASE_URL)
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db)
 
-Base = declarative_base()
\ No newline at end of file
+# Engine async: handlers que rodam no event loop (rotas de autenticação)
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_url(settings.DATABASE_URL)
+
+async_db = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL))
+
+AsyncSessionLocal = async_sessionmaker(
+    async_db,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+if is_sqlite(settings.DATABASE_URL) and settings.SQLITE_WAL:
+    event.listen(db, "connect", set_sqlite_pragmas)
+if is_sqlite(ASYNC_DATABASE_URL) and settings.SQLITE_WAL:
+    event.listen(async_db.sync_engine, "connect", set_sqlite_pragmas)
+
+instrument_engine(db, "sync")
+instrument_engine(async_db.sync_engine, "async")
+
+Base = declarative_base()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, JSON
 from sqlalchemy.sql import func
 from db.database import Base
 
@@ -28,4 +28,39 @@ class RefreshToken(Base):
     jti = Column(String, nullable=False, unique=True, index=True)
     
     created_at = Column(DateTime, server_default=func.now())
-    expire_at = Column(DateTime)
\ No newline at end of file
+    expire_at = Column(DateTime, index=True)
+
+
+class HandHistory(Base):
+    __tablename__ = "hand_histories"
+    id = Column(Integer, primary_key=True)
+
+    room_id = Column(String, nullable=False, index=True)
+    hand_number = Column(Integer, nullable=False)
+    button = Column(Integer)
+    small_blind = Column(Integer, nullable=False)
+    big_blind = Column(Integer, nullable=False)
+    antes = Column(Integer, default=0)
+    seed = Column(BigInteger, nullable=True)  # baralho, para replay da mão
+
+    board = Column(JSON, nullable=False)    # cartas como texto ("Ah")
+    actions = Column(JSON, nullable=False)  # action_log da sessão
+
+    started_at = Column(DateTime, nullable=False)
+    ended_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class HandPlayer(Base):
+    __tablename__ = "hand_players"
+    id = Column(Integer, primary_key=True)
+
+    hand_id = Column(Integer, ForeignKey("hand_histories.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    seat = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)  # 0 = small blind, último = botão
+
+    hole_cards = Column(JSON, nullable=False)
+    starting_stack = Column(Integer, nullable=False)
+    final_stack = Column(Integer, nullable=False)
+    payoff = Column(Integer, nullable=False)
@@ -1,9 +1,12 @@
-from fastapi import Depends, Request, HTTPException
-from sqlalchemy.orm import Session
-from db.database import SessionLocal
-from db.models import User
+import secrets
+from typing import Optional
+
+from fastapi import Request, HTTPException, Header
+from db.database import SessionLocal, AsyncSessionLocal
 from core.security.jwt import decode_token
+from core.security.user_cache import Principal, user_cache
 from core.enums import TokenType
+from core.config import settings
 
 
 def get_db():
@@ -12,9 +15,15 @@ def get_db():
         yield session
     finally:
         session.close()        
-        
 
-def get_current_user(request: Request, session: Session = Depends(get_db)):
+
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+
+def get_current_user(request: Request) -> Principal:
     
     access_token = request.cookies.get("access_token")
 
@@ -34,10 +43,7 @@ def get_current_user(request: Request, session: Session = Depends(get_db)):
 
     user_id = int(payload.get("sub"))
 
-    user = session.query(User).filter(
-        User.id == user_id,
-        User.is_active == True
-    ).first()
+    user = user_cache.get(user_id)
 
     if not user:
         raise HTTPException(
@@ -45,4 +51,18 @@ def get_current_user(request: Request, session: Session = Depends(get_db)):
             detail="Usuário não autorizado"
         )
 
-    return user
\ No newline at end of file
+    return user
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="Administração desativada"
+        )
+
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=403,
+            detail="Token de administração inválido"
+        )
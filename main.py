@@ -1,23 +1,42 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from multiprocessing import get_context
 import uvicorn
 
-from db.database import Base, db
+from core.config import settings
+from db.database import Base, db, async_db
    
 
 app = FastAPI()
 
 
 from routes.auth import auth
-from routes.poker_router import router
+from routes.poker_router import router, room_manager
+from core.poker.equity import load_preflop_table
+from core.poker.evaluator import get_tables
+from core.security.password import password_hasher
+from core.security.refresh_tokens import refresh_token_compactor
+from db.models import RefreshToken
+from core.metrics import HTTP_SECONDS, loop_lag_monitor
+from core.tracing import tracer
 
 app.include_router(auth)
 app.include_router(router)
 
+if settings.METRICS_ENABLED:
+	from routes.metrics import metrics
+	app.include_router(metrics)
+
 
 
 Base.metadata.create_all(bind=db)
 
+# create_all não altera tabelas existentes: índices novos criados à parte
+for index in RefreshToken.__table__.indexes:
+	index.create(bind=db, checkfirst=True)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:7700", "http://127.0.0.1:8000"],
@@ -27,6 +46,75 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+	started = time.perf_counter()
+	response = await call_next(request)
+
+	# Template da rota (não o path) para não explodir a cardinalidade
+	route = request.scope.get("route")
+	HTTP_SECONDS.labels(
+		request.method,
+		route.path if route is not None else "unmatched",
+		str(response.status_code)
+	).observe(time.perf_counter() - started)
+	return response
+
+
+@app.on_event("startup")
+async def startup():
+	await room_manager.start()
+	password_hasher.start()
+	refresh_token_compactor.start()
+	loop_lag_monitor.start()
+
+	if settings.TRACE_ENABLED:
+		tracer.start(settings.TRACE_PROFILE_HZ)
+
+	# Tabelas do avaliador e de equity pré-flop carregadas uma única vez
+	get_tables()
+	load_preflop_table()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+	# Encerramento sem /admin/drain: segura os assentos e grava todas as salas
+	await room_manager.drain()
+	await room_manager.stop()
+	await refresh_token_compactor.stop()
+	loop_lag_monitor.stop()
+	tracer.stop()
+	await async_db.dispose()
+	password_hasher.shutdown()
+
+
+def run_shard(index: int, count: int, bus):
+	"""Processo de um shard: dono das salas que o anel atribui a ele"""
+	from core.sharding.shard import configure_shard
+
+	# O fork herda as conexões abertas pelo create_all do pai: o filho
+	# descarta o pool sem fechá-las (o socket/arquivo continua do pai)
+	db.dispose(close=False)
+	async_db.sync_engine.dispose(close=False)
+
+	bus.bind(index)
+	configure_shard(index, count, bus)
+	uvicorn.run("main:app", host="0.0.0.0", port=settings.SHARD_BASE_PORT + index)
+
 
 if __name__ == "__main__":
-	uvicorn.run("main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
+	if settings.SHARD_COUNT > 1:
+		from core.sharding.bus import MultiprocessingBus
+
+		bus = MultiprocessingBus(settings.SHARD_COUNT)
+		context = get_context()
+		processes = [
+			context.Process(target=run_shard, args=(index, settings.SHARD_COUNT, bus), name=f"shard-{index}")
+			for index in range(settings.SHARD_COUNT)
+		]
+		for process in processes:
+			process.start()
+		for process in processes:
+			process.join()
+	else:
+		uvicorn.run("main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -2,128 +2,142 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from deps import get_db, get_current_user
-from core.security.password import hash_pwd, verify_pwd
-from core.security.jwt import create_token, decode_token
+from deps import get_async_db, get_current_user, require_admin
+from core.security.password import password_hasher
+from core.security.jwt import create_token, decode_token, token_cache
 from core.security.cookies import CookieManager
+from core.security.user_cache import Principal, set_user_active
+from core.security.refresh_tokens import issue_refresh_token, revoked_tokens
+from core.security.rate_limit import auth_rate_limiter
 from schemas import RegistScm, LoginScm
 from db.models import User, RefreshToken
-from core.enums import TokenType 
+from core.enums import TokenType
 
 
 auth = APIRouter(prefix="/auth", tags=["Autenticação"])
 
 
 @auth.post("/register")
-async def register(data: RegistScm, request: Request, session: Session = Depends(get_db)):
-	
-	if session.query(User).filter(User.email == data.email).first():
+async def register(data: RegistScm, request: Request, session: AsyncSession = Depends(get_async_db)):
+
+	auth_rate_limiter.check(request.client.host if request.client else None, data.email)
+
+	if await session.scalar(select(User.id).where(User.email == data.email)):
 	   raise HTTPException(status_code=409, detail="Esse e-mail já existe.")
-		
-	password_crypt = hash_pwd(data.password)
-	
+
+	password_crypt = await password_hasher.hash(data.password)
+
 	new_user = User(
 	email=data.email,
-	password=password_crypt, 
+	password=password_crypt,
 	username=data.username,
 	ip=request.client.host if request.client else None
 	)
 	session.add(new_user)
-	session.commit()
-	session.refresh(new_user)
-	
-	
+
+	# Usuário e refresh token gravados juntos ou nenhum dos dois; o flush
+	# (id do usuário) já esbarra no unique de um registro concorrente
+	try:
+		await session.flush()
+		refresh_token, refresh_jti, refresh_exp = await issue_refresh_token(session, new_user.id)
+		await session.commit()
+	except IntegrityError:
+		await session.rollback()
+		raise HTTPException(status_code=409, detail="Esse e-mail já existe.")
+
 	access_token, access_jti, access_exp = create_token(new_user.id, TokenType.ACCESS)
-	refresh_token, refresh_jti, refresh_exp = create_token(new_user.id, TokenType.REFRESH)
-	
-	refresh_db = RefreshToken(
-	user_id=new_user.id,
-	jti=refresh_jti,
-	expire_at=refresh_exp
-	)
-	session.add(refresh_db)
-	session.commit()
-	session.refresh(refresh_db)
-	
+
 	res = JSONResponse(
 	content={"msg": "Registro concluído"},
 	status_code=201
     )
-    
+
 	CookieManager.set_all(res, access_token, refresh_token)
 	return res
-	
-	
+
+
 
 @auth.post("/login")
-async def login(data: LoginScm, session: Session = Depends(get_db)):
-    
-    user = session.query(User).filter(User.email==data.email).first()
-    
-    if not user or not verify_pwd(data.password, user.password):
+async def login(data: LoginScm, request: Request, session: AsyncSession = Depends(get_async_db)):
+
+    # Antes do banco e do hash: tentativas em excesso custam quase nada
+    auth_rate_limiter.check(request.client.host if request.client else None, data.email)
+
+    user = await session.scalar(select(User).where(User.email == data.email))
+
+    if not user:
+        raise HTTPException(status_code=401, detail="E-mail ou senha invalido")
+
+    valid, new_hash = await password_hasher.verify_and_update(data.password, user.password)
+    if not valid:
         raise HTTPException(status_code=401, detail="E-mail ou senha invalido")
-        
+
+    # Hash com custo antigo: gravado de novo junto com o refresh token
+    if new_hash is not None:
+        user.password = new_hash
+
     access_token, access_jti, access_exp = create_token(user.id, TokenType.ACCESS)
-    refresh_token, refresh_jti, refresh_exp = create_token(user.id, TokenType.REFRESH)
-    
-    refresh_db = RefreshToken(
-	user_id=user.id,
-	jti=refresh_jti,
-	expire_at=refresh_exp
-	)
-    session.add(refresh_db)
-    session.commit()
-    session.refresh(refresh_db)
-    
+    refresh_token, refresh_jti, refresh_exp = await issue_refresh_token(session, user.id)
+    await session.commit()
+
     res = JSONResponse(
     content={"msg": "Login concluído"},
     status_code=200
     )
-    
+
     CookieManager.set_all(res, access_token, refresh_token)
-    
+
     return res
-    
-    
+
+
 
 @auth.post("/logout")
-async def logout(request: Request, user: User = Depends(get_current_user), session: Session = Depends(get_db)):
-	
-	refresh = request.cookies.get("refresh_token")  
-	
+async def logout(request: Request, user: Principal = Depends(get_current_user), session: AsyncSession = Depends(get_async_db)):
+
+	refresh = request.cookies.get("refresh_token")
+
 	if not refresh:
 	   raise HTTPException(status_code=401, detail="Token ausente")
-	   
+
 	payload = decode_token(refresh)
-	
+
 	if payload.get("type") != TokenType.REFRESH.value:
-		raise HTTPException(status_code=401, detail="Token inválido")	
-	
+		raise HTTPException(status_code=401, detail="Token inválido")
+
 	user_id = int(payload.get("sub"))
 	jti = payload.get("jti")
-	
-	refresh_db = session.query(RefreshToken).filter(RefreshToken.user_id == user_id, RefreshToken.jti == jti, RefreshToken.expire_at > datetime.utcnow()).first()  
-	
+
+	if revoked_tokens.is_revoked(jti):
+		raise HTTPException(status_code=401, detail="Token invalido")
+
+	refresh_db = await session.scalar(select(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.jti == jti, RefreshToken.expire_at > datetime.utcnow()))
+
 	if not refresh_db:
-		raise HTTPException(status_code=401, detail="Token invalido")  
-		
-	session.delete(refresh_db)
-	session.commit()  
-	
-	res = JSONResponse(  
-    content={"msg": "Logout concluído"},  
-    status_code=200  
+		raise HTTPException(status_code=401, detail="Token invalido")
+
+	await session.delete(refresh_db)
+	await session.commit()
+
+	revoked_tokens.revoke(jti, payload["exp"])
+	token_cache.invalidate(refresh)
+	token_cache.invalidate(request.cookies.get("access_token"))
+
+	res = JSONResponse(
+    content={"msg": "Logout concluído"},
+    status_code=200
 )
 
 	CookieManager.delete_all(res)
-	
+
 	return res
-	
+
 
 @auth.post("/auto-refresh")
-async def auto_refresh(request: Request, session: Session = Depends(get_db)):
+async def auto_refresh(request: Request, session: AsyncSession = Depends(get_async_db)):
 
     refresh = request.cookies.get("refresh_token")
 
@@ -138,29 +152,27 @@ async def auto_refresh(request: Request, session: Session = Depends(get_db)):
     user_id = int(payload.get("sub"))
     jti = payload.get("jti")
 
-    refresh_db = session.query(RefreshToken).filter(
+    # Token já rotacionado ou revogado: recusado sem consultar o banco
+    if revoked_tokens.is_revoked(jti):
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    refresh_db = await session.scalar(select(RefreshToken).where(
         RefreshToken.user_id == user_id,
         RefreshToken.jti == jti,
         RefreshToken.expire_at > datetime.utcnow()
-    ).first()
+    ))
 
     if not refresh_db:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-    session.delete(refresh_db)
+    await session.delete(refresh_db)
 
     access_token, access_jti, access_exp = create_token(user_id, TokenType.ACCESS)
-    new_refresh_token, new_refresh_jti, new_refresh_exp = create_token(user_id, TokenType.REFRESH)
-
-    new_refresh_db = RefreshToken(
-        user_id=user_id,
-        jti=new_refresh_jti,
-        expire_at=new_refresh_exp
-    )
+    new_refresh_token, new_refresh_jti, new_refresh_exp = await issue_refresh_token(session, user_id)
+    await session.commit()
 
-    session.add(new_refresh_db)
-    session.commit()
-    session.refresh(new_refresh_db)
+    revoked_tokens.revoke(jti, payload["exp"])
+    token_cache.invalidate(refresh)
 
     res = JSONResponse(
         content={"msg": "Token renovado"},
@@ -169,4 +181,24 @@ async def auto_refresh(request: Request, session: Session = Depends(get_db)):
 
     CookieManager.set_all(res, access_token, new_refresh_token)
 
-    return res
\ No newline at end of file
+    return res
+
+
+@auth.post("/users/{user_id}/deactivate", dependencies=[Depends(require_admin)])
+async def deactivate_user(user_id: int, session: AsyncSession = Depends(get_async_db)):
+
+    if not await set_user_active(session, user_id, False):
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    # Sem refresh válido o usuário não obtém novos access tokens
+    result = await session.execute(
+        select(RefreshToken.jti, RefreshToken.expire_at).where(RefreshToken.user_id == user_id)
+    )
+    revoked = result.all()
+    await session.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+    await session.commit()
+
+    for jti, expire_at in revoked:
+        revoked_tokens.revoke(jti, expire_at)
+
+    return {"msg": "Usuário desativado"}
@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import registry, stats_samples
+from core.sharding.shard import get_shard
+from core.security.jwt import token_cache
+from core.security.user_cache import user_cache
+from core.security.password import password_hasher
+from core.security.rate_limit import auth_rate_limiter
+from core.security.refresh_tokens import revoked_tokens, refresh_token_compactor
+from routes.poker_router import room_manager
+
+metrics = APIRouter(tags=["Métricas"])
+
+
+def _connections() -> int:
+    return sum(len(room["connection_manager"].active_connections) for room in list(room_manager.rooms.values()))
+
+
+def _seated_players() -> int:
+    return sum(len(room["players"]) for room in list(room_manager.rooms.values()))
+
+
+def _actor_queue_depth() -> int:
+    return sum(room["actor"].queue.qsize() for room in list(room_manager.rooms.values()))
+
+
+registry.gauge("poker_rooms", "Salas ativas neste shard", lambda: len(room_manager.rooms))
+registry.gauge("poker_lobby_rooms", "Salas conhecidas em todos os shards", lambda: len(room_manager.lobby))
+registry.gauge("ws_connections", "Conexões WebSocket abertas", _connections)
+registry.gauge("poker_seated_players", "Jogadores sentados e conectados", _seated_players)
+registry.gauge("poker_actor_queue_depth", "Comandos aguardando nos actors das salas", _actor_queue_depth)
+registry.gauge("poker_draining", "1 enquanto o processo está em drain", lambda: room_manager.draining)
+
+
+@registry.collector
+def _component_stats():
+    shard = {"shard": str(get_shard().index)}
+    samples = []
+
+    samples += stats_samples("auth_token_cache", token_cache.get_stats(), shard)
+    samples += stats_samples("auth_user_cache", user_cache.get_stats(), shard)
+    samples += stats_samples("auth_password_hasher", password_hasher.get_stats(), shard)
+    samples += stats_samples("auth_revoked_tokens", revoked_tokens.get_stats(), shard)
+    samples += stats_samples("auth_refresh_compaction", refresh_token_compactor.get_stats(), shard)
+
+    limiter = auth_rate_limiter.get_stats()
+    samples += stats_samples("auth_rate_limit_ip", limiter["ip"], shard)
+    samples += stats_samples("auth_rate_limit_email", limiter["email"], shard)
+
+    if room_manager.hand_history is not None:
+        samples += stats_samples("hand_history", room_manager.hand_history.get_stats(), shard)
+
+    if room_manager.engine_pool is not None:
+        for worker in room_manager.engine_pool.get_stats():
+            samples += stats_samples("poker_engine", worker, {**shard, "worker": str(worker["worker"])})
+
+    return samples
+
+
+@metrics.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
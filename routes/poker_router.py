@@ -1,13 +1,19 @@
 from typing import Optional
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse, PlainTextResponse
 import logging
 
-from deps import get_db
+from deps import get_current_user, require_admin
+from core.config import settings
 from core.websocket.deps_ws import get_current_user_ws
-from core.websocket.ws import ConnectionManager
 from core.poker.room_manager import GameRoomManager  # <-- Import da classe gerenciadora
-from db.models import User
+from core.sharding.shard import get_shard
+from core.poker.cards import parse_card_codes
+from core.poker.equity import calculate_equity
+from core.poker.hand_archive import ShardedHandArchive, iter_phh
+from schemas import EquityScm
+from core.security.user_cache import Principal
+from core.tracing import current_lane, tracer
 
 router = APIRouter(prefix="/game", tags=["Poker"])
 
@@ -16,164 +22,217 @@ logger = logging.getLogger(__name__)
 
 room_manager = GameRoomManager()
 
+# Close code enviado quando a sala pertence a outro shard
+SHARD_REDIRECT_CLOSE_CODE = 4301
+# Código com que o uvicorn fecha os websockets ao encerrar o processo
+SERVICE_RESTART_CLOSE_CODE = 1012
+
+
+@router.get("/rooms")
+async def list_rooms():
+    return {"rooms": room_manager.lobby}
+
+
+@router.get("/rooms/{room_id}/shard")
+async def room_shard(room_id: str):
+    shard = get_shard()
+    owner = shard.owner(room_id)
+    return {
+        "room_id": room_id,
+        "shard": owner,
+        "url": f"{shard.url_for(owner)}/game/poker/{room_id}"
+    }
+
+
+@router.post("/equity")
+async def equity(data: EquityScm, user: Principal = Depends(get_current_user)):
+    try:
+        hands = [parse_card_codes(hand) for hand in data.hands]
+        board = parse_card_codes(data.board)
+        # Numpy pesado: fora do event loop
+        return await room_manager.run_engine(calculate_equity, hands, board, settings.EQUITY_SAMPLES)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _allin_equity(room: dict, samples: int):
+    # Roda na vez da sala na fila do actor, no engine dela
+    session = room["game_session"]
+    if not session:
+        raise HTTPException(status_code=404, detail="Sala sem mão em andamento")
+    return session.get_allin_equity(samples)
+
+
+@router.get("/rooms/{room_id}/equity")
+async def room_equity(room_id: str, user: Principal = Depends(get_current_user)):
+    room = room_manager.get_room(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Sala sem mão em andamento")
+
+    result = await room["actor"].query(_allin_equity, room, settings.EQUITY_SAMPLES)
+    if result is None:
+        raise HTTPException(status_code=409, detail="A mão não terminou em all-in")
+
+    return result
+
+
+@router.post("/rooms/{room_id}/snapshot", dependencies=[Depends(require_admin)])
+async def room_snapshot(room_id: str):
+    if not room_manager.get_room(room_id):
+        raise HTTPException(status_code=404, detail="Sala não encontrada")
+
+    written = await room_manager.checkpoint([room_id], force=True)
+    return {"room_id": room_id, "written": written}
+
+
+@router.post("/admin/drain", dependencies=[Depends(require_admin)])
+async def drain():
+    """Antes de encerrar o processo: grava todas as salas e segura os assentos"""
+    written = await room_manager.drain()
+    return {"draining": True, "snapshots": written}
+
+
+@router.get("/admin/trace", dependencies=[Depends(require_admin)])
+async def trace_status():
+    return tracer.get_status()
+
+
+@router.post("/admin/trace/start", dependencies=[Depends(require_admin)])
+async def trace_start(
+    profile_hz: int = Query(settings.TRACE_PROFILE_HZ, ge=0, le=1000),
+    clear: bool = True
+):
+    """Liga o tracing (e o profiler por amostragem, com profile_hz > 0)"""
+    if clear:
+        tracer.stop()
+        tracer.clear()
+    tracer.start(profile_hz)
+    return tracer.get_status()
+
+
+@router.post("/admin/trace/stop", dependencies=[Depends(require_admin)])
+async def trace_stop():
+    tracer.stop()
+    return tracer.get_status()
+
+
+@router.get("/admin/trace/chrome", dependencies=[Depends(require_admin)])
+async def trace_chrome():
+    """Spans do ring buffer no formato Chrome trace (chrome://tracing, Perfetto)"""
+    return tracer.chrome_trace()
+
+
+@router.get("/admin/trace/profile", dependencies=[Depends(require_admin)])
+async def trace_profile():
+    """Pilhas amostradas no formato folded (flamegraph.pl, speedscope)"""
+    return PlainTextResponse(tracer.folded_stacks())
+
+
+@router.get("/history/segments", dependencies=[Depends(require_admin)])
+async def history_segments():
+    if not settings.HAND_ARCHIVE_ENABLED:
+        raise HTTPException(status_code=404, detail="Arquivo de mãos desativado")
+
+    archive = ShardedHandArchive(settings.HAND_ARCHIVE_DIR)
+    return {
+        "segments": [
+            {"shard": shard, "segment": segment, "hands": archive.count(shard, segment)}
+            for shard, segment in archive.segments()
+        ]
+    }
+
+
+@router.get("/history/export", dependencies=[Depends(require_admin)])
+async def history_export(
+    shard: Optional[int] = None,
+    segment: Optional[int] = None,
+    format: str = Query("phh", pattern="^(phh|raw)$")
+):
+    """
+    Exporta o arquivo de mãos de todos os shards em streaming: texto PHH
+    (pokerkit), uma mão por vez, ou os registros binários crus (varint
+    tamanho + payload). Inclui as cartas de todos os jogadores.
+    """
+    if not settings.HAND_ARCHIVE_ENABLED:
+        raise HTTPException(status_code=404, detail="Arquivo de mãos desativado")
+
+    archive = ShardedHandArchive(settings.HAND_ARCHIVE_DIR)
+    selected = archive.select(
+        [shard] if shard is not None else None,
+        [segment] if segment is not None else None
+    )
+    if (shard is not None or segment is not None) and not selected:
+        raise HTTPException(status_code=404, detail="Segmento não encontrado")
+
+    if format == "raw":
+        return StreamingResponse(archive.iter_segments(selected, raw=True), media_type="application/octet-stream")
+
+    return StreamingResponse(iter_phh(archive.iter_segments(selected)), media_type="text/plain; charset=utf-8")
+
 
 @router.websocket("/poker/{room_id}")
 async def poker_websocket(
     websocket: WebSocket, 
-    room_id: str,
-    db: Session = Depends(get_db)
+    room_id: str
 ):
     await websocket.accept()
     
+    shard = get_shard()
+    if not shard.owns(room_id):
+        # Sala de outro shard: informa o endereço correto e encerra
+        owner = shard.owner(room_id)
+        url = f"{shard.url_for(owner)}{websocket.url.path}"
+        if websocket.url.query:
+            # Mantém o ?token=... para o cliente reconectar já autenticado
+            url = f"{url}?{websocket.url.query}"
+        await websocket.send_json({
+            "type": "redirect",
+            "shard": owner,
+            "url": url
+        })
+        await websocket.close(code=SHARD_REDIRECT_CLOSE_CODE, reason="Sala pertence a outro shard")
+        return
+    
+    # Trilha desta conexão no tracing (herdada pela tarefa de envio)
+    client = websocket.client
+    current_lane.set(f"ws {client.host}:{client.port}" if client else f"ws {id(websocket)}")
+
     try:
-        user = await get_current_user_ws(websocket, db)
+        if tracer.enabled:
+            with tracer.span("auth", "ws", room=room_id):
+                user = await get_current_user_ws(websocket)
+        else:
+            user = await get_current_user_ws(websocket)
     except Exception as e:
         await websocket.close(code=1008, reason="Authentication failed")
         logger.error(f"Auth failed: {e}")
         return
     
-    room = room_manager.get_room(room_id)
-    if not room:
-        room = room_manager.create_room(room_id)
+    # Sala em memória ou restaurada do último snapshot
+    room = await room_manager.get_or_restore_room(room_id)
     
     conn_manager = room["connection_manager"]
+    actor = room["actor"]
     await conn_manager.connect(websocket)
     
-    player_id = None
-    
     try:
         while True:
             data = await websocket.receive_json()
-            action = data.get("action")
-            
-            if action == "join":
-                chips = data.get("chips", 1000)
-                
-                player_id = len(room["players"])
-                room["players"][websocket] = {
-                    "player_id": player_id,
-                    "chips": chips,
-                    "user_id": user.id,
-                    "username": user.username
-                }
-                room["player_stacks"].append(chips)
-                
-                await conn_manager.send_to(websocket, {
-                    "type": "joined",
-                    "player_id": player_id,
-                    "players_count": len(room["players"])
-                })
-                
-                await conn_manager.broadcast_except(websocket, {
-                    "type": "player_joined",
-                    "player_id": player_id,
-                    "players_count": len(room["players"])
-                })
-            
-            elif action == "start":
-                if len(room["players"]) < 2:
-                    await conn_manager.send_to(websocket, {
-                        "type": "error",
-                        "message": "Mínimo de 2 jogadores necessário"
-                    })
-                    continue
-                
-                first_player = next(iter(room["players"].values()))
-                if first_player["player_id"] != 0:
-                    await conn_manager.send_to(websocket, {
-                        "type": "error",
-                        "message": "Apenas o primeiro jogador pode iniciar a partida"
-                    })
-                    continue
-                
-                room["game_session"] = PokerGameSession(
-                    player_count=len(room["players"]),
-                    starting_stacks=tuple(room["player_stacks"]),
-                    small_blind=50,
-                    big_blind=100
-                )
-                
-                game_state = room["game_session"].get_game_state()
-                
-                await conn_manager.broadcast({
-                    "type": "game_started",
-                    "state": game_state
-                })
-            
-            elif action == "move" and room["game_session"]:
-                player_info = room["players"].get(websocket)
-                if not player_info:
-                    continue
-                
-                current_player = room["game_session"].get_current_player()
-                if current_player != player_info["player_id"]:
-                    await conn_manager.send_to(websocket, {
-                        "type": "error",
-                        "message": "Não é seu turno"
-                    })
-                    continue
-                
-                move = data.get("move")
-                amount = data.get("amount", 0)
-                
-                try:
-                    move_result = room["game_session"].process_move(
-                        player_id=player_info["player_id"],
-                        move=move,
-                        amount=amount
-                    )
-                    
-                    if move_result["success"]:
-                        
-                        game_state = room["game_session"].get_game_state()
-                        
-                        if room["game_session"].is_hand_complete():
-                            hand_result = room["game_session"].get_hand_result()
-                            await conn_manager.broadcast({
-                                "type": "hand_complete",
-                                "state": game_state,
-                                "result": hand_result
-                            })
-                        else:
-                            await conn_manager.broadcast({
-                                "type": "update",
-                                "state": game_state
-                            })
-                    else:
-                        await conn_manager.send_to(websocket, {
-                            "type": "error",
-                            "message": move_result["error"]
-                        })
-                        
-                except Exception as e:
-                    logger.error(f"Error processing move: {e}")
-                    await conn_manager.send_to(websocket, {
-                        "type": "error",
-                        "message": "Erro interno ao processar jogada"
-                    })
-            
-            elif action == "get_state" and room["game_session"]:
-                game_state = room["game_session"].get_game_state(player_id)
-                await conn_manager.send_to(websocket, {
-                    "type": "state",
-                    "state": game_state
-                })
+            if tracer.enabled:
+                action = data.get("action") if isinstance(data, dict) else None
+                with tracer.span("receive", "ws", action=action, user=user.id):
+                    await actor.submit(websocket, user, data)
+            else:
+                await actor.submit(websocket, user, data)
     
-    except WebSocketDisconnect:
+    except WebSocketDisconnect as e:
         logger.info(f"WebSocket disconnected for user {user.id}")
         conn_manager.disconnect(websocket)
-        
-        if websocket in room["players"]:
-            del room["players"][websocket]
-       
-        if len(room["players"]) == 0:
-            room_manager.remove_room(room_id)
-        else:
-            await conn_manager.broadcast({
-                "type": "player_left",
-                "players_count": len(room["players"])
-            })
+        # Fechado pelo shutdown do servidor: o assento segue no snapshot
+        restart = e.code == SERVICE_RESTART_CLOSE_CODE
+        await actor.submit(websocket, user, {"action": "leave", "restart": restart})
     
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        conn_manager.disconnect(websocket)
\ No newline at end of file
+        conn_manager.disconnect(websocket)
+        await actor.submit(websocket, user, {"action": "leave"})
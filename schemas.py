@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel, EmailStr, constr
 
 
@@ -15,4 +17,9 @@ class LoginScm(BaseModel):
 	password: constr(min_length=8)
 	
 	class Config:
-		from_attributes = True
\ No newline at end of file
+		from_attributes = True
+
+
+class EquityScm(BaseModel):
+    hands: List[List[str]]
+    board: List[str] = []
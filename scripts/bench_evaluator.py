@@ -0,0 +1,46 @@
+"""
+Compara o StandardHighHand do pokerkit com o avaliador de tabelas de
+core.poker.evaluator (escalar e em lote) em mãos de 7 cartas.
+
+Uso: python -m scripts.bench_evaluator [mãos]
+"""
+import sys
+import time
+
+import numpy as np
+from pokerkit import StandardHighHand
+
+from core.poker.cards import CARDS_BY_INDEX
+from core.poker.evaluator import evaluate, evaluate_batch, get_tables
+
+
+def random_hands(count: int, seed: int = 20240101) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.random((count, 52)).argpartition(7, axis=1)[:, :7]
+
+
+def bench(label: str, count: int, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {count / elapsed:>14,.0f} mãos/s")
+
+
+def main(count: int = 100_000):
+    hands = random_hands(count)
+    rows = hands.tolist()
+    get_tables()
+
+    # O pokerkit é ordens de grandeza mais lento: mede numa amostra menor
+    sample = rows[:min(count, 5000)]
+    parsed = [[CARDS_BY_INDEX[card] for card in row] for row in sample]
+
+    bench("pokerkit StandardHighHand", len(parsed), lambda: [
+        StandardHighHand.from_game(cards[:2], cards[2:]) for cards in parsed
+    ])
+    bench("evaluate (escalar)", count, lambda: [evaluate(row) for row in rows])
+    bench("evaluate_batch (NumPy)", count, lambda: evaluate_batch(hands))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
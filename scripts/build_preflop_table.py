@@ -0,0 +1,69 @@
+"""
+Gera a tabela heads-up pré-flop 169 x 169 (equity e empate) usada por core.poker.equity.
+
+Uso: python -m scripts.build_preflop_table [amostras_por_confronto]
+"""
+import sys
+import time
+
+import numpy as np
+
+from core.poker.equity import PREFLOP_TABLE_PATH, hand_class
+from core.poker.evaluator import evaluate_batch
+
+
+def class_combos():
+    # Todas as combinações concretas de 2 cartas de cada uma das 169 classes
+    combos = [[] for _ in range(169)]
+    for first in range(52):
+        for second in range(first + 1, 52):
+            combos[hand_class(first, second)].append((first, second))
+    return [np.array(combo, dtype=np.int64) for combo in combos]
+
+
+def matchup_odds(rng, first, second, samples):
+    # Pares de combinações sem cartas em comum
+    pairs = [
+        (a, b) for a in first for b in second
+        if len({a[0], a[1], b[0], b[1]}) == 4
+    ]
+    chosen = rng.integers(len(pairs), size=samples)
+    hands = np.array([np.concatenate(pair) for pair in pairs], dtype=np.int64)[chosen]
+
+    # Board aleatório: 5 cartas do baralho sem as 4 já usadas
+    keys = rng.random((samples, 52))
+    np.put_along_axis(keys, hands, 2.0, axis=1)
+    boards = keys.argpartition(5, axis=1)[:, :5]
+
+    first_values = evaluate_batch(np.hstack([hands[:, :2], boards]))
+    second_values = evaluate_batch(np.hstack([hands[:, 2:], boards]))
+    ties = first_values == second_values
+    return ((first_values > second_values) + 0.5 * ties).mean(), ties.mean()
+
+
+def main(samples: int = 4000):
+    rng = np.random.default_rng(20240101)
+    combos = class_combos()
+    # [0]: equity, [1]: probabilidade de empate (pontos-base)
+    table = np.zeros((2, 169, 169), dtype=np.uint16)
+    started = time.perf_counter()
+
+    for i in range(169):
+        table[0, i, i] = 5000
+        for j in range(i + 1, 169):
+            equity, tie = matchup_odds(rng, combos[i], combos[j], samples)
+            table[0, i, j] = round(equity * 10000)
+            table[0, j, i] = 10000 - table[0, i, j]
+            table[1, i, j] = table[1, j, i] = round(tie * 10000)
+
+    # Mesma classe: equity 50% por simetria, só o empate é amostrado
+    for i in range(169):
+        _, tie = matchup_odds(rng, combos[i], combos[i], samples)
+        table[1, i, i] = round(tie * 10000)
+
+    np.save(PREFLOP_TABLE_PATH, table)
+    print(f"{PREFLOP_TABLE_PATH} gerado em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4000)
@@ -0,0 +1,35 @@
+"""
+Converte segmentos do arquivo binário de mãos para texto PHH (pokerkit),
+uma mão por vez.
+
+Uso: python -m scripts.export_hand_archive [diretório] [segmento ...] [--shard N ...] [--out arquivo]
+"""
+import argparse
+import sys
+
+from core.config import settings
+from core.poker.hand_archive import ShardedHandArchive, iter_phh
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=settings.HAND_ARCHIVE_DIR)
+    parser.add_argument("segments", nargs="*", type=int, help="padrão: todos")
+    parser.add_argument("--shard", type=int, action="append", help="padrão: todos os shards")
+    parser.add_argument("--out", help="arquivo de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    archive = ShardedHandArchive(args.directory)
+    hands = archive.iter_hands(args.shard, args.segments or None)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for text in iter_phh(hands):
+            out.write(text + "\n")
+    finally:
+        if args.out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
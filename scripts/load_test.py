@@ -0,0 +1,474 @@
+"""
+Teste de carga do WebSocket de poker com bots jogando em N salas.
+
+Sobe o app no próprio processo (uvicorn numa porta livre) ou usa um
+servidor já rodando (--url, com o mesmo DATABASE_URL e SECRET_KEY), cria
+os usuários bot, gera os JWTs com create_token e mede jogadas/s, latência
+das atualizações, memória por sala e CPU. O resultado sai em JSON para
+comparar execuções entre commits.
+
+Uso: python -m scripts.load_test [--rooms N] [--players M] [--duration S] [--url ws://host:porta] [--output arquivo.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import websockets
+
+from core.config import settings
+from core.enums import TokenType
+from core.security.jwt import create_token
+from db.database import SessionLocal
+from db.models import User
+
+BOT_EMAIL = "bot{index}@loadtest.local"
+
+
+def ensure_bot_users(count: int) -> List[int]:
+    """Usuários bot (criados só na primeira execução); retorna os ids"""
+    emails = [BOT_EMAIL.format(index=index) for index in range(count)]
+    session = SessionLocal()
+    try:
+        existing = dict(session.query(User.email, User.id).filter(User.email.in_(emails)).all())
+        missing = [email for email in emails if email not in existing]
+        if missing:
+            session.add_all([
+                User(email=email, password="!", username=email.split("@")[0])
+                for email in missing
+            ])
+            session.commit()
+            existing = dict(session.query(User.email, User.id).filter(User.email.in_(emails)).all())
+
+        # Bots desativados numa execução anterior voltam a jogar
+        session.query(User).filter(User.email.in_(emails)).update({User.is_active: True})
+        session.commit()
+        return [existing[email] for email in emails]
+    finally:
+        session.close()
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Sem /proc: pico de RSS (ru_maxrss em KB no Linux, bytes no macOS)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LoadRun:
+    """Estado compartilhado por todas as salas da execução"""
+
+    def __init__(self, url: str, connect_concurrency: int):
+        self.url = url
+        self.latencies = array("d")
+        self.measuring = False
+        self.stop = asyncio.Event()
+        self.connect_slots = asyncio.Semaphore(connect_concurrency)
+
+
+class RoomRun:
+    """
+    Uma mesa de bots. Sem recompra no protocolo, a mesa que trava (só um
+    jogador com fichas) é reaberta numa sala nova com stacks cheios.
+    """
+
+    def __init__(self, run: LoadRun, name: str, tokens: List[str], seed: float):
+        self.run = run
+        self.name = name
+        self.generation = 0
+        rng = random.Random(seed)
+        self.bots = [Bot(self, token, random.Random(rng.random())) for token in tokens]
+        self.joined = asyncio.Event()
+        self.stalled = asyncio.Event()
+        self.move_sent_at: Optional[float] = None
+        self.moves = 0
+        self.hands = 0
+        self.errors = 0
+        self.resets = 0
+
+    @property
+    def room_id(self) -> str:
+        return f"{self.name}-{self.generation}"
+
+    async def connect(self):
+        # O primeiro bot entra antes dos outros e fica no assento 0
+        await self.bots[0].connect()
+        await asyncio.gather(*[bot.connect() for bot in self.bots[1:]])
+        if self.bots[0].player_id != 0:
+            raise RuntimeError(f"Sala {self.room_id} não estava vazia")
+
+    async def play(self, ready: asyncio.Event):
+        """Joga mãos até `run.stop`, reabrindo a mesa a cada trava"""
+        await self.connect()
+        while True:
+            readers = [asyncio.create_task(bot.run()) for bot in self.bots]
+            await self.joined.wait()
+            await ready.wait()
+
+            if not self.run.stop.is_set():
+                await self.bots[0].start_hand()
+            stop = asyncio.create_task(self.run.stop.wait())
+            stalled = asyncio.create_task(self.stalled.wait())
+            await asyncio.wait((stop, stalled), return_when=asyncio.FIRST_COMPLETED)
+            stop.cancel()
+            stalled.cancel()
+
+            self.move_sent_at = None
+            await asyncio.gather(*[bot.close() for bot in self.bots], return_exceptions=True)
+            await asyncio.gather(*readers, return_exceptions=True)
+            if self.run.stop.is_set():
+                return
+
+            self.resets += 1
+            self.generation += 1
+            self.joined.clear()
+            self.stalled.clear()
+            await self.connect()
+
+
+class Bot:
+    """
+    Cliente que entra na sala, espera a vez e joga ações válidas: na maior
+    parte check/call, às vezes fold (quando há aposta) ou raise mínimo.
+    O assento 0 inicia as mãos.
+    """
+
+    def __init__(self, room: RoomRun, token: str, rng: random.Random):
+        self.room = room
+        self.token = token
+        self.rng = rng
+        self.player_id: Optional[int] = None
+        self.state: Dict[str, Any] = {}
+        self.players: Dict[int, Dict[str, Any]] = {}
+        self.last_move: Optional[str] = None
+        self.ws = None
+
+    async def connect(self):
+        target = f"{self.room.run.url}/game/poker/{self.room.room_id}?token={self.token}"
+        self.state, self.players, self.last_move = {}, {}, None
+
+        async with self.room.run.connect_slots:
+            while True:
+                self.ws = await websockets.connect(target, max_size=None, ping_interval=None)
+                await self.ws.send(json.dumps({"action": "join", "chips": 1000}))
+                message = json.loads(await self.ws.recv())
+
+                # Entradas simultâneas: avisos de outros bots chegam antes do "joined"
+                while message.get("type") == "player_joined":
+                    message = json.loads(await self.ws.recv())
+
+                # Sala de outro shard: reconecta no endereço indicado
+                if message.get("type") == "redirect":
+                    await self.ws.close()
+                    target = f"{message['url']}?token={self.token}"
+                    continue
+
+                if message.get("type") != "joined":
+                    raise RuntimeError(f"Join recusado: {message}")
+                self.player_id = message["player_id"]
+                if message["players_count"] >= len(self.room.bots):
+                    self.room.joined.set()
+                return
+
+    async def run(self):
+        try:
+            async for raw in self.ws:
+                await self._on_message(json.loads(raw))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def start_hand(self):
+        self.room.move_sent_at = time.perf_counter()
+        await self.ws.send(json.dumps({"action": "start"}))
+
+    @property
+    def stopping(self) -> bool:
+        return self.room.run.stop.is_set() or self.room.stalled.is_set()
+
+    async def _on_message(self, message: Dict[str, Any]):
+        kind = message.get("type")
+
+        if kind == "player_joined":
+            if message["players_count"] >= len(self.room.bots):
+                self.room.joined.set()
+            return
+
+        if kind == "error":
+            self.room.errors += 1
+            if self.last_move is not None:
+                # Jogada recusada: tenta call e, se também falhar, fold
+                fallback = {"call": "fold"}.get(self.last_move, "call")
+                if self.last_move != "fold" and not self.stopping:
+                    await self._send_move(fallback)
+                else:
+                    self.last_move = None
+            elif self.player_id == 0:
+                self.room.stalled.set()
+            return
+
+        if kind in ("game_started", "hand_complete"):
+            self._apply_state(message["state"])
+        elif kind == "delta":
+            self._apply_delta(message["delta"])
+        else:
+            return
+
+        self._record_update()
+
+        if self.stopping:
+            return
+
+        if kind == "hand_complete":
+            if self.player_id == 0:
+                if self.room.run.measuring:
+                    self.room.hands += 1
+                await self.start_hand()
+            return
+
+        if self.state.get("active") and self.state.get("current_player") == self.player_id:
+            await self._play()
+
+    def _record_update(self):
+        sent_at = self.room.move_sent_at
+        if sent_at is None:
+            return
+        measuring = self.room.run.measuring
+        if measuring:
+            self.room.run.latencies.append(time.perf_counter() - sent_at)
+        if self.last_move is not None:
+            self.last_move = None
+            if measuring:
+                self.room.moves += 1
+
+    def _apply_state(self, state: Dict[str, Any]):
+        self.state = dict(state)
+        self.players = {player["id"]: dict(player) for player in state.get("players", [])}
+
+    def _apply_delta(self, delta: Dict[str, Any]):
+        for key, value in delta.items():
+            if key != "players":
+                self.state[key] = value
+        for player in delta.get("players", []):
+            self.players.setdefault(player["id"], {}).update(player)
+
+    async def _play(self):
+        me = self.players.get(self.player_id, {})
+        stack = me.get("stack", 0)
+        to_call = max((player.get("bet", 0) for player in self.players.values()), default=0) - me.get("bet", 0)
+        min_raise = self.state.get("min_raise")
+
+        roll = self.rng.random()
+        if roll < 0.1 and to_call > 0:
+            move, amount = "fold", 0
+        elif roll < 0.2 and min_raise and min_raise <= stack + me.get("bet", 0):
+            move, amount = "raise", min_raise
+        else:
+            move, amount = "call", 0
+
+        await self._send_move(move, amount)
+
+    async def _send_move(self, move: str, amount: int = 0):
+        self.last_move = move
+        self.room.move_sent_at = time.perf_counter()
+        await self.ws.send(json.dumps({"action": "move", "move": move, "amount": amount}))
+
+
+def percentile_ms(values: np.ndarray, q: float) -> Optional[float]:
+    if not len(values):
+        return None
+    return float(np.percentile(values, q) * 1000)
+
+
+def server_metrics() -> Dict[str, Any]:
+    """Métricas do servidor (só quando roda no mesmo processo)"""
+    from core.metrics import MOVE_SECONDS, STATE_BUILD_SECONDS, FANOUT_SECONDS, loop_lag_monitor
+
+    def mean_ms(histogram) -> Optional[float]:
+        count = sum(histogram.counts)
+        return histogram.sum / count * 1000 if count else None
+
+    return {
+        "process_move_ms": {
+            values[0]: mean_ms(histogram) for values, histogram in MOVE_SECONDS.children.items()
+        },
+        "state_build_ms": mean_ms(STATE_BUILD_SECONDS),
+        "fanout_ms": mean_ms(FANOUT_SECONDS),
+        "event_loop_lag_max_ms": loop_lag_monitor.max_lag * 1000,
+    }
+
+
+async def run_load(args) -> Dict[str, Any]:
+    if args.url is not None:
+        return await drive(args, args.url, in_process=False)
+
+    import uvicorn
+    from main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", ws_ping_interval=None
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.05)
+
+    try:
+        return await drive(args, f"ws://127.0.0.1:{port}", in_process=True)
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+async def drive(args, url: str, in_process: bool) -> Dict[str, Any]:
+    total_bots = args.rooms * args.players
+    user_ids = ensure_bot_users(total_bots)
+    tokens = [create_token(user_id, TokenType.ACCESS)[0] for user_id in user_ids]
+    rng = random.Random(args.seed)
+
+    # Conexões em ondas limitadas para não medir a tempestade de handshakes
+    run = LoadRun(url, args.connect_concurrency)
+    rooms = [
+        RoomRun(run, f"{args.room_prefix}-{index}", tokens[index * args.players:(index + 1) * args.players], rng.random())
+        for index in range(args.rooms)
+    ]
+
+    rss_before = rss_bytes()
+    ready = asyncio.Event()
+    connect_started = time.perf_counter()
+    players = [asyncio.create_task(room.play(ready)) for room in rooms]
+
+    # Todas as mesas cheias; um erro de conexão interrompe a espera
+    all_joined = asyncio.ensure_future(asyncio.gather(*[room.joined.wait() for room in rooms]))
+    await asyncio.wait([all_joined, *players], return_when=asyncio.FIRST_COMPLETED)
+    failed = [task for task in players if task.done() and task.exception()]
+    if failed:
+        all_joined.cancel()
+        for task in players:
+            task.cancel()
+        await asyncio.gather(*players, return_exceptions=True)
+        raise failed[0].exception()
+    connect_time = time.perf_counter() - connect_started
+
+    run.measuring = True
+    cpu_before = cpu_seconds()
+    started = time.perf_counter()
+    ready.set()
+
+    await asyncio.sleep(args.duration)
+
+    elapsed = time.perf_counter() - started
+    cpu_used = cpu_seconds() - cpu_before
+    rss_after = rss_bytes()
+    run.measuring = False
+
+    stats = server_metrics() if in_process else None
+
+    run.stop.set()
+    await asyncio.gather(*players, return_exceptions=True)
+
+    values = np.frombuffer(run.latencies, dtype=np.float64) if len(run.latencies) else np.array([])
+    moves = sum(room.moves for room in rooms)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rooms": args.rooms,
+            "players_per_room": args.players,
+            "clients": total_bots,
+            "duration": args.duration,
+            "in_process": in_process,
+            "url": url,
+            "seed": args.seed,
+            "engine_workers": settings.POKER_ENGINE_WORKERS,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": {
+            "elapsed": elapsed,
+            "connect_time": connect_time,
+            "moves": moves,
+            "moves_per_second": moves / elapsed if elapsed else 0.0,
+            "hands": sum(room.hands for room in rooms),
+            "hands_per_second": sum(room.hands for room in rooms) / elapsed if elapsed else 0.0,
+            "updates": len(values),
+            "latency_ms": {
+                "p50": percentile_ms(values, 50),
+                "p99": percentile_ms(values, 99),
+                "p999": percentile_ms(values, 99.9),
+                "max": float(values.max() * 1000) if len(values) else None,
+            },
+            "errors": sum(room.errors for room in rooms),
+            "table_resets": sum(room.resets for room in rooms),
+            # Deste processo: servidor + clientes no modo local, só clientes com --url
+            "rss_bytes": rss_after,
+            "rss_per_room_bytes": (rss_after - rss_before) / args.rooms,
+            "cpu_seconds": cpu_used,
+            "cpu_percent": cpu_used / elapsed * 100 if elapsed else 0.0,
+            "server": stats,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--players", type=int, default=6, help="bots por sala")
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de medição")
+    parser.add_argument("--url", help="servidor já rodando (ws://host:porta); padrão: app no processo")
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--room-prefix", default="loadtest")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="arquivo JSON do resultado (padrão: só stdout)")
+    args = parser.parse_args(argv)
+
+    if args.players < 2:
+        parser.error("--players precisa ser pelo menos 2")
+
+    report = asyncio.run(run_load(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Audita o arquivo binário de mãos: reexecuta cada mão com seed e compara
+cartas, board e stacks finais com o registrado.
+
+Uso: python -m scripts.replay_hands [diretório] [segmento ...] [--shard N ...] [--workers N]
+"""
+import argparse
+import json
+import os
+
+from core.config import settings
+from core.poker.hand_archive import ShardedHandArchive
+from core.poker.replay import audit_hands
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=settings.HAND_ARCHIVE_DIR)
+    parser.add_argument("segments", nargs="*", type=int, help="padrão: todos")
+    parser.add_argument("--shard", type=int, action="append", help="padrão: todos os shards")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    archive = ShardedHandArchive(args.directory)
+    report = audit_hands(archive.iter_hands(args.shard, args.segments or None), workers=args.workers)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
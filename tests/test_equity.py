@@ -0,0 +1,23 @@
+from core.poker.cards import parse_card_codes
+from core.poker.equity import calculate_equity
+
+
+def test_full_board_is_evaluated_directly():
+    hands = [parse_card_codes(["Ah", "Ad"]), parse_card_codes(["Kh", "Kd"])]
+    board = parse_card_codes(["2c", "7s", "9d", "Jc", "3h"])
+
+    result = calculate_equity(hands, board)
+
+    assert result["method"] == "exact"
+    assert result["samples"] == 1
+    assert [player["equity"] for player in result["players"]] == [1.0, 0.0]
+
+
+def test_full_board_split_pot():
+    hands = [parse_card_codes(["2h", "3d"]), parse_card_codes(["2s", "3c"])]
+    board = parse_card_codes(["Ac", "Kd", "Qs", "Jh", "Tc"])
+
+    result = calculate_equity(hands, board)
+
+    assert [player["tie"] for player in result["players"]] == [1.0, 1.0]
+    assert [player["equity"] for player in result["players"]] == [0.5, 0.5]